@@ -209,12 +209,13 @@ def detect_city_from_coordinates(geometries: list[dict]) -> Optional[str]:
     if not coordinates:
         return None
     
-    # Count coordinates in each city's bounding box
+    # Count coordinates in each city's bounding box (bounds unpacked once, test inlined)
     city_scores = {city_code: 0 for city_code in CITIES.keys()}
+    city_bboxes = [(city_code, *city_config.default_bbox) for city_code, city_config in CITIES.items()]
     
-    for coord in coordinates:
-        for city_code, city_config in CITIES.items():
-            if is_coordinate_in_bbox(coord, city_config.default_bbox):
+    for lat, lon in coordinates:
+        for city_code, south, west, north, east in city_bboxes:
+            if south <= lat <= north and west <= lon <= east:
                 city_scores[city_code] += 1
     
     # Return city with highest score
@@ -261,11 +262,8 @@ def validate_coordinates_in_zones(street_data: dict, city_code: str) -> bool:
         return True  # No coordinates to validate
     
     # Check if any coordinate is within city's default bbox
-    for coord in coordinates:
-        if is_coordinate_in_bbox(coord, city_config.default_bbox):
-            return True
-    
-    return False
+    south, west, north, east = city_config.default_bbox
+    return any(south <= lat <= north and west <= lon <= east for lat, lon in coordinates)
 
 def merge_duplicate_geometries(existing_geometries: list[dict], new_geometries: list[dict]) -> list[dict]:
     """Merge two geometry lists, removing exact duplicates"""
@@ -1,12 +1,67 @@
+import hashlib
+import heapq
 import json
+import logging
+import queue
 import requests
+import threading
 import time
 import re
 import os
+import sys
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener
+from operator import itemgetter
 from typing import Dict, List, Tuple, Set, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from city_configs import CITIES, CITY_PREFIXES, CityConfig
 
+# Per-place progress goes through a queue so fetch workers never block on stdout;
+# per-variant details are DEBUG and are not even formatted at the default INFO level
+logger = logging.getLogger("coordinates_fetcher")
+
+# Outside process_ordinances (e.g. fetch_place or flush called directly) records go straight to stdout
+_stdout_handler = logging.StreamHandler(sys.stdout)
+_stdout_handler.setFormatter(logging.Formatter("%(message)s"))
+logger.addHandler(_stdout_handler)
+logger.setLevel(logging.INFO)
+logger.propagate = False
+
+# Leading street-type prefix ("Via ", "Piazza ", ...) stripped in one anchored scan
+_PREFIX_STRIP = re.compile(r'^(Via|Viale|Piazza|Piazzale|Corso|Largo)\s+')
+
+# Runs of whitespace, collapsed to one space when normalizing place names
+_WHITESPACE = re.compile(r'\s+')
+
+# Civic addresses: "Via X civico 123" and "Via X (fronte civico 123)" (match() anchors the start)
+_CIVICO_DIRECT = re.compile(r'(.+?)\s+civico\s+(\d+)$')
+_CIVICO_FRONTE = re.compile(r'(.+?)\s*\(fronte civico (\d+)\)$')
+
+# Accessors for Overpass geometry nodes ({'lat': ..., 'lon': ...})
+_get_lat = itemgetter('lat')
+_get_lon = itemgetter('lon')
+# Coordinate pairs are kept as (lat, lon) tuples built in C; JSON writes them as [lat, lon]
+_get_lat_lon = itemgetter('lat', 'lon')
+
+OVERPASS_URL = "http://overpass-api.de/api/interpreter"
+
+# Concurrent fetch_place workers per city
+FETCH_WORKERS = 4
+
+# Max requests in flight per endpoint (the rate limiters only space request starts)
+OVERPASS_MAX_CONCURRENT = 2
+NOMINATIM_MAX_CONCURRENT = 1
+
+# Progress is reported once per this many fetched elements (and at the end of each city)
+PROGRESS_EVERY = 50
+
+# Max names per batched Overpass query (keeps each query within server complexity limits)
+OVERPASS_BATCH_SIZE = 50
+
 
 def get_zone_bbox(city_config: CityConfig, zone_name: str) -> Optional[Tuple[float, float, float, float]]:
     """Get bounding box for a zone, handling zone mappings"""
@@ -64,13 +119,172 @@ def union_bboxes(bboxes: List[Tuple[float, float, float, float]]) -> Tuple[float
     
     return (min_south, min_west, max_north, max_east)
 
+def _clip_coords(coords: List[List[float]], city_bbox: Tuple[float, float, float, float],
+                 zone_bbox: Optional[Tuple[float, float, float, float]] = None) -> Tuple[List[List[float]], int, int]:
+    """Keep coordinates inside the city bbox and zone bbox, counting those dropped by each"""
+    c_south, c_west, c_north, c_east = city_bbox
+    z_south, z_west, z_north, z_east = zone_bbox or city_bbox
+    kept = []
+    city_out = 0
+    for c in coords:
+        if len(c) < 2 or not (c_south <= c[0] <= c_north and c_west <= c[1] <= c_east):
+            city_out += 1
+        elif z_south <= c[0] <= z_north and z_west <= c[1] <= z_east:
+            kept.append(c)
+    return kept, city_out, len(coords) - len(kept) - city_out
+
+def _build_variants(name: str, city: CityConfig) -> List[str]:
+    """Generate search variants for a place name"""
+    variants = [name]
+    #return variants
+
+    # First, extract base name by removing common prefixes
+    base_name = name
+    original_prefix = ""
+
+    prefix_match = _PREFIX_STRIP.match(name)
+    if prefix_match:
+        base_name = name[prefix_match.end():].strip()
+        original_prefix = prefix_match.group(1) + " "
+
+    # Add base name without prefix
+    if base_name != name:
+        variants.append(base_name)
+
+    # 1. Apply special cases from city config using the base name
+    base_name_lower = base_name.lower()
+
+    for pattern, replacements in city.special_cases.items():
+        pattern_lower = pattern.lower()
+
+        # Check if the base name matches the pattern (case insensitive)
+        if base_name_lower == pattern_lower or pattern_lower in base_name_lower:
+            if replacements == []:  # Empty list = skip entirely
+                return []
+            elif replacements == "":  # Empty string = remove pattern
+                continue
+            elif isinstance(replacements, list):  # List = add variants
+                for replacement in replacements:
+                    variants.append(replacement)
+                    # Also try with original prefix if it had one
+                    if original_prefix:
+                        variants.append(f"{original_prefix}{replacement}")
+
+    # 2. Check for partial word matches in base name
+    words = base_name_lower.split()
+    for pattern, replacements in city.special_cases.items():
+        pattern_lower = pattern.lower()
+        pattern_words = pattern_lower.split()
+
+        # Check if pattern words are a subsequence of base name words
+        if len(pattern_words) <= len(words):
+            for i in range(len(words) - len(pattern_words) + 1):
+                if words[i:i+len(pattern_words)] == pattern_words:
+                    if isinstance(replacements, list):
+                        for replacement in replacements:
+                            # Replace the matched words with replacement
+                            new_words = words[:i] + [replacement] + words[i+len(pattern_words):]
+                            variant = " ".join(new_words)
+                            variants.append(variant)
+                            if original_prefix:
+                                variants.append(f"{original_prefix}{variant}")
+
+    # Remove duplicates and empty strings, preserve order
+    seen = set()
+    final_variants = []
+    for v in variants:
+        v_clean = v.strip()
+        if v_clean and v_clean.lower() not in seen:
+            seen.add(v_clean.lower())
+            final_variants.append(v_clean)
+
+    return final_variants
+
+def _normalize_key(key: str) -> str:
+    """Normalize a cache key so case and spacing variants of a name collide"""
+    return _WHITESPACE.sub(' ', key.strip().lower())
+
+def _escape_overpass_regex(text: str) -> str:
+    """Escape regex metacharacters for use inside an Overpass QL regex string literal"""
+    escaped = re.sub(r'([.^$*+?()\[\]{}|\\])', r'\\\1', text)
+    # Backslashes and quotes must also survive the QL string literal
+    return escaped.replace('\\', '\\\\').replace('"', '\\"')
+
+@lru_cache(maxsize=8192)
+def _variants_cached(city_prefix: str, name: str) -> Tuple[str, ...]:
+    """Memoized search variants, keyed by hashable city prefix"""
+    return tuple(_build_variants(name, CITIES[city_prefix]))
+
+@lru_cache(maxsize=8192)
+def _zone_bbox_cached(city_prefix: str, zone_name: str) -> Optional[Tuple[float, float, float, float]]:
+    """Memoized get_zone_bbox, keyed by hashable city prefix"""
+    return get_zone_bbox(CITIES[city_prefix], zone_name)
+
+def _start_log_listener() -> Optional[QueueListener]:
+    """Route fetcher log records through a background thread writing to stdout"""
+    if _stdout_handler not in logger.handlers:
+        return None  # Already routed through a running listener
+    log_queue = queue.Queue()
+    listener = QueueListener(log_queue, _stdout_handler)
+    logger.removeHandler(_stdout_handler)
+    logger.addHandler(QueueHandler(log_queue))
+    listener.start()
+    return listener
+
+def _stop_log_listener(listener: Optional[QueueListener]):
+    """Drain and stop a listener from _start_log_listener, writing to stdout directly again"""
+    if listener is None:
+        return
+    listener.stop()
+    for handler in list(logger.handlers):
+        if isinstance(handler, QueueHandler):
+            logger.removeHandler(handler)
+    logger.addHandler(_stdout_handler)
+
+class RateLimiter:
+    """Thread-safe minimum interval between requests to one endpoint"""
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_time = 0.0
+
+    def wait(self):
+        """Block until the next request slot is available"""
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_time - now
+            self._next_time = max(now, self._next_time) + self.min_interval
+        if delay > 0:
+            time.sleep(delay)
+
 class CoordinatesFetcher:
     def __init__(self, cache_file="coordinates.json"):
         self.cache_file = cache_file
+        self.wal_file = cache_file + ".wal"  # Append-only log of updates since last compaction
         self.cache = self._load_cache()
+        self._normalized_keys = {_normalize_key(key): key for key in self.cache}  # normalized -> stored key
+        self.overpass_cache_file = os.path.join(os.path.dirname(cache_file), "overpass_cache.json")
+        self.overpass_cache = self._load_overpass_cache()  # sha1(query body) -> parsed response
+        self._overpass_empty = {}  # sha1(query body) -> complete but empty response, this run only
         self.session = requests.Session()
         self.session.headers.update({"User-Agent": "CoordinatesFetcher/2.0"})
+        # Keep-alive pool sized for the fetch workers; back off and retry on throttling/gateway errors
+        # (Overpass queries are read-only, so POST is safe to retry)
+        adapter = HTTPAdapter(
+            pool_connections=4, pool_maxsize=FETCH_WORKERS * 2,
+            max_retries=Retry(total=3, backoff_factor=1.0, status_forcelist=[429, 502, 503, 504],
+                              allowed_methods=["GET", "POST"])
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
         self.stats = {'fetched': 0, 'cached': 0, 'failed': 0, 'filtered': 0, 'zone_filtered': 0}
+        self._pending_places = {}  # city_prefix -> set of names queued for batch lookup
+        self._lock = threading.Lock()  # Guards cache, stats and update log across fetch workers
+        self.overpass_limiter = RateLimiter(1.0)
+        self.nominatim_limiter = RateLimiter(1.2)
+        self._overpass_slots = threading.BoundedSemaphore(OVERPASS_MAX_CONCURRENT)
+        self._nominatim_slots = threading.BoundedSemaphore(NOMINATIM_MAX_CONCURRENT)
+        self._batched_geometries = {}  # (city_prefix, name) -> geometries from batch lookup
 
     def _load_cache(self) -> Dict:
         """Load existing coordinates cache"""
@@ -108,6 +322,20 @@ class CoordinatesFetcher:
                 except Exception as e:
                     print(f"📦 Error loading {cache_file}: {e}")
         
+        # Replay updates logged since the last compaction
+        if os.path.exists(self.wal_file):
+            replayed = 0
+            with open(self.wal_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        break  # Truncated final record from an interrupted write
+                    cache[record['k']] = record['v']
+                    replayed += 1
+            if replayed:
+                print(f"📦 Replayed {replayed} updates from {self.wal_file}")
+        
         if not cache:
             print("📦 Starting fresh cache")
         else:
@@ -115,10 +343,54 @@ class CoordinatesFetcher:
         
         return cache
 
+    def _load_overpass_cache(self) -> Dict:
+        """Load Overpass responses saved by previous runs"""
+        if os.path.exists(self.overpass_cache_file):
+            try:
+                with open(self.overpass_cache_file, 'r', encoding='utf-8') as f:
+                    overpass_cache = json.load(f)
+                print(f"📦 Loaded {len(overpass_cache)} Overpass responses from {self.overpass_cache_file}")
+                return overpass_cache
+            except Exception as e:
+                print(f"📦 Error loading {self.overpass_cache_file}: {e}")
+        return {}
+
+    def _update_cache(self, key: str, value: Dict):
+        """Store a cache entry and append it to the update log"""
+        record = json.dumps({'k': key, 'v': value}, ensure_ascii=False) + '\n'
+        with self._lock:
+            self.cache[key] = value
+            self._normalized_keys.setdefault(_normalize_key(key), key)
+            with open(self.wal_file, 'a', encoding='utf-8') as f:
+                f.write(record)
+
+    def _lookup_cache(self, key: str) -> Optional[Dict]:
+        """Get a cache entry by exact key, falling back to a normalized match"""
+        cached = self.cache.get(key)
+        if not (cached and cached.get('geometries')):
+            cached = self.cache.get(self._normalized_keys.get(_normalize_key(key)), cached)
+        return cached
+
+    def _has_geometries(self, key: str) -> bool:
+        """Whether the cache holds usable geometries for key; entries without any are fetched again"""
+        cached = self._lookup_cache(key)
+        return bool(cached and cached.get('geometries'))
+
+    def _count(self, stat: str, amount: int = 1):
+        """Increment a stats counter"""
+        with self._lock:
+            self.stats[stat] += amount
+
     def _save_cache(self):
-        """Save coordinates cache"""
+        """Save coordinates cache (compaction: rewrite the full file and clear the update log)"""
+        # json.dumps encodes in one call (the C encoder when there is no indent) and the
+        # file gets a single write; json.dump always streams through the Python encoder
         with open(self.cache_file, 'w', encoding='utf-8') as f:
-            json.dump(self.cache, f, ensure_ascii=False, indent=2)
+            f.write(json.dumps(self.cache, ensure_ascii=False, indent=2))
+        if os.path.exists(self.wal_file):
+            os.remove(self.wal_file)
+        with open(self.overpass_cache_file, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(self.overpass_cache, ensure_ascii=False))
 
     def _detect_city(self, ord_id: str) -> Optional[str]:
         """Detect city from ordinance ID"""
@@ -141,7 +413,7 @@ class CoordinatesFetcher:
             # First endpoint
             endpoint1 = tract_match.group(2).strip()
             # Check if it's a civic address reference in parentheses
-            civic_match1 = re.search(r'^(.+?)\s*\(fronte civico (\d+)\)$', endpoint1)
+            civic_match1 = _CIVICO_FRONTE.match(endpoint1)
             if civic_match1:
                 street = civic_match1.group(1).strip()
                 civic_num = civic_match1.group(2)
@@ -149,7 +421,7 @@ class CoordinatesFetcher:
                 elements.add(f"{street} civico {civic_num}")  # Add the civic address
             else:
                 # Check if endpoint1 is already a civic address
-                civic_direct1 = re.search(r'^(.+?)\s+civico\s+(\d+)$', endpoint1)
+                civic_direct1 = _CIVICO_DIRECT.match(endpoint1)
                 if civic_direct1:
                     street = civic_direct1.group(1).strip()
                     elements.add(street)  # Add the street itself
@@ -160,7 +432,7 @@ class CoordinatesFetcher:
             # Second endpoint
             endpoint2 = tract_match.group(3).strip()
             # Check if it's a civic address reference in parentheses
-            civic_match2 = re.search(r'^(.+?)\s*\(fronte civico (\d+)\)$', endpoint2)
+            civic_match2 = _CIVICO_FRONTE.match(endpoint2)
             if civic_match2:
                 street = civic_match2.group(1).strip()
                 civic_num = civic_match2.group(2)
@@ -168,7 +440,7 @@ class CoordinatesFetcher:
                 elements.add(f"{street} civico {civic_num}")
             else:
                 # Check if it's already a civic address
-                civic_direct2 = re.search(r'^(.+?)\s+civico\s+(\d+)$', endpoint2)
+                civic_direct2 = _CIVICO_DIRECT.match(endpoint2)
                 if civic_direct2:
                     street = civic_direct2.group(1).strip()
                     elements.add(street)  # Add the street itself
@@ -194,7 +466,7 @@ class CoordinatesFetcher:
                 # First street/place
                 place1 = match.group(1).strip()
                 # Check if place1 has civic in parentheses
-                civic_in_place1 = re.search(r'^(.+?)\s*\(fronte civico (\d+)\)$', place1)
+                civic_in_place1 = _CIVICO_FRONTE.match(place1)
                 if civic_in_place1:
                     street = civic_in_place1.group(1).strip()
                     civic_num = civic_in_place1.group(2)
@@ -206,7 +478,7 @@ class CoordinatesFetcher:
                 # Second street/place  
                 place2 = match.group(2).strip()
                 # Check if place2 has civic in parentheses
-                civic_in_place2 = re.search(r'^(.+?)\s*\(fronte civico (\d+)\)$', place2)
+                civic_in_place2 = _CIVICO_FRONTE.match(place2)
                 if civic_in_place2:
                     street = civic_in_place2.group(1).strip()
                     civic_num = civic_in_place2.group(2)
@@ -220,7 +492,7 @@ class CoordinatesFetcher:
                 return elements
 
         # 3. CIVIC ADDRESS: "Via X (fronte civico 123)" -> extract "Via X" and "Via X civico 123"
-        civico_match = re.search(r'^(.+?)\s*\(fronte civico (\d+)\)$', specification)
+        civico_match = _CIVICO_FRONTE.match(specification)
         if civico_match:
             street = civico_match.group(1).strip()
             civic_num = civico_match.group(2)
@@ -229,7 +501,7 @@ class CoordinatesFetcher:
             return elements
         
         # 3b. Direct civic address: "Via X civico 123" -> extract "Via X" and keep full address
-        direct_civico_match = re.search(r'^(.+?)\s+civico\s+(\d+)$', specification)
+        direct_civico_match = _CIVICO_DIRECT.match(specification)
         if direct_civico_match:
             street = direct_civico_match.group(1).strip()
             elements.add(street)  # Add just the street
@@ -243,79 +515,14 @@ class CoordinatesFetcher:
 
     def _generate_variants(self, name: str, city: CityConfig) -> List[str]:
         """Generate search variants for a place name"""
-        variants = [name]
-        #return variants
-        
-        # First, extract base name by removing common prefixes
-        prefixes = ["Via ", "Viale ", "Piazza ", "Piazzale ", "Corso ", "Largo "]
-        base_name = name
-        original_prefix = ""
-        
-        for prefix in prefixes:
-            if name.startswith(prefix):
-                base_name = name[len(prefix):].strip()
-                original_prefix = prefix
-                break
-        
-        # Add base name without prefix
-        if base_name != name:
-            variants.append(base_name)
-        
-        # 1. Apply special cases from city config using the base name
-        base_name_lower = base_name.lower()
-        
-        for pattern, replacements in city.special_cases.items():
-            pattern_lower = pattern.lower()
-            
-            # Check if the base name matches the pattern (case insensitive)
-            if base_name_lower == pattern_lower or pattern_lower in base_name_lower:
-                if replacements == []:  # Empty list = skip entirely
-                    return []
-                elif replacements == "":  # Empty string = remove pattern
-                    continue
-                elif isinstance(replacements, list):  # List = add variants
-                    for replacement in replacements:
-                        variants.append(replacement)
-                        # Also try with original prefix if it had one
-                        if original_prefix:
-                            variants.append(f"{original_prefix}{replacement}")
-        
-        # 2. Check for partial word matches in base name
-        words = base_name_lower.split()
-        for pattern, replacements in city.special_cases.items():
-            pattern_lower = pattern.lower()
-            pattern_words = pattern_lower.split()
-            
-            # Check if pattern words are a subsequence of base name words
-            if len(pattern_words) <= len(words):
-                for i in range(len(words) - len(pattern_words) + 1):
-                    if words[i:i+len(pattern_words)] == pattern_words:
-                        if isinstance(replacements, list):
-                            for replacement in replacements:
-                                # Replace the matched words with replacement
-                                new_words = words[:i] + [replacement] + words[i+len(pattern_words):]
-                                variant = " ".join(new_words)
-                                variants.append(variant)
-                                if original_prefix:
-                                    variants.append(f"{original_prefix}{variant}")
-                
-        # Remove duplicates and empty strings, preserve order
-        seen = set()
-        final_variants = []
-        for v in variants:
-            v_clean = v.strip()
-            if v_clean and v_clean.lower() not in seen:
-                seen.add(v_clean.lower())
-                final_variants.append(v_clean)
-
-        return final_variants
+        return list(_variants_cached(CITY_PREFIXES[city.city_name], name))
 
     def _parse_element(self, element: str) -> Set[str]:
         """Parse single element - handle civic addresses"""
         elements = set()
         
         # Civic: "Via X (fronte civico 123)" -> ["Via X", "Via X civico 123"]
-        civico_match = re.search(r'^(.+?)\s*\(fronte civico (\d+)\)$', element)
+        civico_match = _CIVICO_FRONTE.match(element)
         if civico_match:
             street = civico_match.group(1).strip()
             civic_num = civico_match.group(2)
@@ -326,31 +533,26 @@ class CoordinatesFetcher:
         
         return elements
 
-    def _is_inside_bbox(self, coord: List[float], bbox: Tuple[float, float, float, float]) -> bool:
-        """Check if coordinate is inside bounding box"""
-        if len(coord) < 2:
-            return False
-        lat, lon = coord[0], coord[1]
-        south, west, north, east = bbox
-        return south <= lat <= north and west <= lon <= east
-
     def _filter_geometries(self, geometries: List[Dict], target_bbox: Tuple[float, float, float, float], filter_type: str = "zone") -> Tuple[List[Dict], int]:
         """Filter geometries to keep only coordinates inside bbox"""
         filtered = []
         filtered_count = 0
+        # Unpack the bounds once; the bbox test is inlined below
+        south, west, north, east = target_bbox
         
         for geom in geometries:
             coords = geom.get('coordinates', [])
             geom_type = geom.get('type')
             
             if geom_type == 'Point':
-                if self._is_inside_bbox(coords, target_bbox):
+                if len(coords) >= 2 and south <= coords[0] <= north and west <= coords[1] <= east:
                     filtered.append(geom)
                 else:
                     filtered_count += 1
                     
             elif geom_type == 'LineString':
-                valid_coords = [c for c in coords if self._is_inside_bbox(c, target_bbox)]
+                valid_coords = [c for c in coords
+                                if len(c) >= 2 and south <= c[0] <= north and west <= c[1] <= east]
                 if valid_coords:
                     new_geom = dict(geom)
                     new_geom['coordinates'] = valid_coords
@@ -359,7 +561,8 @@ class CoordinatesFetcher:
                 
             elif geom_type == 'Polygon':
                 outer_ring = coords[0] if coords else []
-                valid_coords = [c for c in outer_ring if self._is_inside_bbox(c, target_bbox)]
+                valid_coords = [c for c in outer_ring
+                                if len(c) >= 2 and south <= c[0] <= north and west <= c[1] <= east]
                 if valid_coords and len(valid_coords) >= 3:
                     # Ensure closed polygon
                     if valid_coords[0] != valid_coords[-1]:
@@ -370,12 +573,150 @@ class CoordinatesFetcher:
                 filtered_count += len(outer_ring) - len(valid_coords)
         
         if filter_type == "zone":
-            self.stats['zone_filtered'] += filtered_count
+            self._count('zone_filtered', filtered_count)
         else:
-            self.stats['filtered'] += filtered_count
+            self._count('filtered', filtered_count)
         
         return filtered, filtered_count
 
+    def _filter_geometries_multi(self, geometries: List[Dict], city_bbox: Tuple[float, float, float, float],
+                                 zone_bbox: Optional[Tuple[float, float, float, float]] = None) -> Tuple[List[Dict], int, int]:
+        """Filter geometries to the city bbox and (optionally) the zone bbox in a single pass"""
+        filtered = []
+        city_filtered_count = zone_filtered_count = 0
+        
+        for geom in geometries:
+            coords = geom.get('coordinates', [])
+            geom_type = geom.get('type')
+            
+            if geom_type == 'Point':
+                kept, city_out, zone_out = _clip_coords([coords], city_bbox, zone_bbox)
+                if kept:
+                    filtered.append(geom)
+                    
+            elif geom_type == 'LineString':
+                kept, city_out, zone_out = _clip_coords(coords, city_bbox, zone_bbox)
+                if kept:
+                    new_geom = dict(geom)
+                    new_geom['coordinates'] = kept
+                    filtered.append(new_geom)
+                
+            elif geom_type == 'Polygon':
+                kept, city_out, zone_out = _clip_coords(coords[0] if coords else [], city_bbox, zone_bbox)
+                if len(kept) >= 3:
+                    # Ensure closed polygon
+                    if kept[0] != kept[-1]:
+                        kept.append(kept[0])
+                    new_geom = dict(geom)
+                    new_geom['coordinates'] = [kept]
+                    filtered.append(new_geom)
+            else:
+                continue
+            
+            city_filtered_count += city_out
+            zone_filtered_count += zone_out
+        
+        self._count('filtered', city_filtered_count)
+        self._count('zone_filtered', zone_filtered_count)
+        return filtered, city_filtered_count, zone_filtered_count
+
+    def _overpass_json(self, response: requests.Response) -> Dict:
+        """Parse an Overpass response body directly from bytes (skips text decoding)"""
+        return json.loads(response.content)
+
+    def _overpass_post(self, query: str, timeout: int = 30) -> Optional[Dict]:
+        """POST a query to Overpass, reusing the parsed response for identical query bodies"""
+        key = hashlib.sha1(query.encode('utf-8')).hexdigest()
+        if key in self.overpass_cache:
+            return self.overpass_cache[key]
+        if key in self._overpass_empty:
+            return self._overpass_empty[key]
+        
+        with self._overpass_slots:
+            self.overpass_limiter.wait()
+            response = self.session.post(OVERPASS_URL, data=query, timeout=timeout)
+        
+        if response.status_code != 200:
+            return None
+        
+        data = self._overpass_json(response)
+        # Timeouts and runtime errors also come back as 200 with a "remark" and empty or
+        # partial elements, so those are never reused. Only non-empty answers are persisted;
+        # empty ones are reused within this run, since OSM may gain the name later
+        if 'remark' not in data:
+            if data.get('elements'):
+                self.overpass_cache[key] = data
+            else:
+                self._overpass_empty[key] = data
+        return data
+
+    def _element_to_geometry(self, elem: Dict, name: str = '') -> Optional[Dict]:
+        """Convert an Overpass element into a Point, LineString or Polygon geometry"""
+        if elem.get('type') == 'node':
+            lat, lon = elem.get('lat'), elem.get('lon')
+            if lat and lon:
+                return {'type': 'Point', 'coordinates': (lat, lon)}
+        elif 'geometry' in elem and elem['geometry']:
+            coords = list(map(_get_lat_lon, elem['geometry']))
+            if len(coords) > 1:
+                # Check if closed (polygon); closed ways repeat the exact first node,
+                # so compare directly and only fall back to epsilon when inexact
+                first, last = coords[0], coords[-1]
+                is_closed = len(coords) > 3 and (
+                    first == last or
+                    (abs(first[0] - last[0]) < 0.00001 and abs(first[1] - last[1]) < 0.00001))
+                
+                elem_tags = elem.get('tags', {})
+                if (is_closed or 'piazza' in name.lower() or 
+                    elem_tags.get('amenity') == 'marketplace'):
+                    if not is_closed:
+                        coords.append(coords[0])
+                    return {'type': 'Polygon', 'coordinates': [coords]}
+                return {'type': 'LineString', 'coordinates': coords}
+        return None
+
+    def queue_place(self, place_name: str, city_prefix: str):
+        """Queue a place name for the next batched Overpass lookup"""
+        self._pending_places.setdefault(city_prefix, set()).add(place_name)
+
+    def flush(self):
+        """Resolve queued names with one Overpass query per batch of OVERPASS_BATCH_SIZE names"""
+        for city_prefix, names in self._pending_places.items():
+            city = CITIES[city_prefix]
+            south, west, north, east = city.default_bbox
+            names = sorted(names)
+            
+            for i in range(0, len(names), OVERPASS_BATCH_SIZE):
+                batch = names[i:i + OVERPASS_BATCH_SIZE]
+                # Build the union in one join instead of growing a string with +=
+                escaped_names = (name.replace('"', '\\"') for name in batch)
+                clauses = ''.join(f'way[name="{escaped_name}"]({south},{west},{north},{east});'
+                                  for escaped_name in escaped_names)
+                # "out tags geom" returns tags and geometry without each way's node id list, which is never read
+                query = f'[out:json][timeout:60]; ({clauses}); out tags geom;'
+                
+                try:
+                    data = self._overpass_post(query, timeout=60)
+                    if data is None:
+                        continue
+                    
+                    # De-multiplex the combined response by element name
+                    found = 0
+                    for elem in data.get('elements', []):
+                        name = elem.get('tags', {}).get('name', '')
+                        geometry = self._element_to_geometry(elem, name)
+                        if geometry:
+                            key = (city_prefix, name)
+                            if key not in self._batched_geometries:
+                                found += 1
+                            self._batched_geometries.setdefault(key, []).append(geometry)
+                    logger.info("   📦 Batch lookup: %d/%d names found", found, len(batch))
+                    
+                except Exception as e:
+                    logger.warning("   ❌ Error in batch lookup: %s", e)
+        
+        self._pending_places = {}
+
     def _search_nominatim(self, query: str, city: CityConfig) -> List[str]:
         """Search place in Nominatim API"""
         south, west, north, east = city.default_bbox
@@ -389,12 +730,13 @@ class CoordinatesFetcher:
         }
         
         try:
-            response = self.session.get(
-                "https://nominatim.openstreetmap.org/search", 
-                params=params, timeout=30
-            )
-            time.sleep(1.2)  # Rate limiting
-            
+            with self._nominatim_slots:
+                self.nominatim_limiter.wait()
+                response = self.session.get(
+                    "https://nominatim.openstreetmap.org/search", 
+                    params=params, timeout=30
+                )
+
             if response.status_code == 200:
                 results = []
                 for result in response.json():
@@ -415,17 +757,8 @@ class CoordinatesFetcher:
         try:
             # Get element info
             query1 = f"[out:json]; (way({osm_id}); node({osm_id});); out tags;"
-            response = self.session.post(
-                "http://overpass-api.de/api/interpreter", 
-                data=query1, timeout=30
-            )
-            time.sleep(1.0)
-            
-            if response.status_code != 200:
-                return []
-            
-            data = response.json()
-            if not data.get('elements'):
+            data = self._overpass_post(query1)
+            if not data or not data.get('elements'):
                 return []
             
             element = data['elements'][0]
@@ -435,7 +768,7 @@ class CoordinatesFetcher:
             if element.get('type') == 'node':
                 lat, lon = element.get('lat'), element.get('lon')
                 if lat and lon:
-                    return [{'type': 'Point', 'coordinates': [lat, lon]}]
+                    return [{'type': 'Point', 'coordinates': (lat, lon)}]
             
             # Handle ways - get all segments with same name OR marketplace amenity
             name = tags.get('name', '')
@@ -450,22 +783,17 @@ class CoordinatesFetcher:
             if name:
                 escaped_name = name.replace('"', '\\"')
                 # Try exact match first
-                query2 = f'[out:json]; way[name="{escaped_name}"]({south},{west},{north},{east}); out geom;'
+                query2 = f'[out:json]; way[name="{escaped_name}"]({south},{west},{north},{east}); out tags geom;'
             else:
                 # Search by amenity=marketplace
                 query2 = f'[out:json]; (way[amenity="marketplace"]({south},{west},{north},{east}); node[amenity="marketplace"]({south},{west},{north},{east});); out geom;'
             
-            response = self.session.post(
-                "http://overpass-api.de/api/interpreter", 
-                data=query2, timeout=30
-            )
-            time.sleep(1.0)
-            
-            if response.status_code != 200:
+            data = self._overpass_post(query2)
+            if data is None:
                 return []
             
             geometries = []
-            elements = response.json().get('elements', [])
+            elements = data.get('elements', [])
             
             # If exact match failed and we have a name, try case-insensitive regex
             if not elements and name:
@@ -474,7 +802,7 @@ class CoordinatesFetcher:
                 
                 # Clean the search name and extract key words
                 clean_name = search_name.strip()
-                words = clean_name.replace("Via ", "").replace("Viale ", "").replace("Piazza ", "").replace("Corso ", "").strip().split()
+                words = _PREFIX_STRIP.sub('', clean_name, count=1).strip().split()
                 
                 if words:
                     # Try with last word (most specific)
@@ -484,34 +812,17 @@ class CoordinatesFetcher:
                     if len(key_word) >= 3:
                         query3 = f'[out:json]; way[name~"{key_word}",i]({south},{west},{north},{east}); out geom;'
                         
-                        print(f"         🔍 Trying regex search with cleaned key: '{key_word}' (from '{search_name}')")
+                        logger.debug("         🔍 Trying regex search with cleaned key: '%s' (from '%s')", key_word, search_name)
 
             for elem in elements:
-                if elem.get('type') == 'node':
-                    lat, lon = elem.get('lat'), elem.get('lon')
-                    if lat and lon:
-                        geometries.append({'type': 'Point', 'coordinates': [lat, lon]})
-                elif 'geometry' in elem and elem['geometry']:
-                    coords = [[p['lat'], p['lon']] for p in elem['geometry']]
-                    if len(coords) > 1:
-                        # Check if closed (polygon)
-                        is_closed = (len(coords) > 3 and 
-                                abs(coords[0][0] - coords[-1][0]) < 0.00001 and 
-                                abs(coords[0][1] - coords[-1][1]) < 0.00001)
-                        
-                        elem_tags = elem.get('tags', {})
-                        if (is_closed or 'piazza' in name.lower() or 
-                            elem_tags.get('amenity') == 'marketplace'):
-                            if not is_closed:
-                                coords.append(coords[0])
-                            geometries.append({'type': 'Polygon', 'coordinates': [coords]})
-                        else:
-                            geometries.append({'type': 'LineString', 'coordinates': coords})
+                geometry = self._element_to_geometry(elem, name)
+                if geometry:
+                    geometries.append(geometry)
             
             return geometries
             
         except Exception as e:
-            print(f"         ❌ Exception in _get_geometry: {e}")
+            logger.warning("         ❌ Exception in _get_geometry: %s", e)
             return []
         
     
@@ -527,19 +838,18 @@ class CoordinatesFetcher:
                 coords = elem['geometry']
                 if len(coords) > 2:
                     # Calculate bounding box area
-                    lats = [p['lat'] for p in coords]
-                    lons = [p['lon'] for p in coords]
+                    lats = list(map(_get_lat, coords))
+                    lons = list(map(_get_lon, coords))
                     area = (max(lats) - min(lats)) * (max(lons) - min(lons))
                     
                     # Skip tiny fragments (< 0.00001 degrees²)
                     if area > 0.00001:
                         element_data.append((elem, area))
         
-        # Sort by area and keep largest 10
-        element_data.sort(key=lambda x: x[1], reverse=True)
-        filtered = [elem for elem, area in element_data[:10]]
+        # Keep largest 10 by area
+        filtered = [elem for elem, area in heapq.nlargest(10, element_data, key=lambda x: x[1])]
         
-        print(f"         🔧 Square filtering: {len(elements)} → {len(filtered)} elements")
+        logger.debug("         🔧 Square filtering: %d → %d elements", len(elements), len(filtered))
         return filtered
 
     def _search_overpass_direct(self, place_name: str, city: CityConfig, zone_bboxes: List[Tuple[float, float, float, float]]) -> List[Dict]:
@@ -555,16 +865,14 @@ class CoordinatesFetcher:
             if pattern.lower() in place_lower:
                 if isinstance(replacements, list) and replacements:
                     for replacement in replacements:
-                        clean_replacement = replacement.replace("Via ", "").replace("Piazza ", "").replace("Viale ", "").replace("Corso ", "").strip()
+                        clean_replacement = _PREFIX_STRIP.sub('', replacement, count=1).strip()
                         if len(clean_replacement) >= 3:
                             search_terms.append(clean_replacement.lower())
                     break
         
         # If no special cases found, use original logic
         if not search_terms:
-            clean_name = place_name
-            for prefix in ["Via ", "Viale ", "Piazza ", "Piazzale ", "Corso ", "Largo "]:
-                clean_name = clean_name.replace(prefix, "")
+            clean_name = _PREFIX_STRIP.sub('', place_name, count=1)
             
             if "(" in clean_name:
                 clean_name = clean_name.split("(")[0]
@@ -585,68 +893,38 @@ class CoordinatesFetcher:
                     search_terms.append(clean_word)
                     break
         
-        print(f"         🔍 Direct search terms: {search_terms}")
+        logger.debug("         🔍 Direct search terms: %s", search_terms)
         
         for term in search_terms:
             # Create multiple search variants for character encoding issues
             search_variants = [term]
             
-            # Add variants with different accent handling
-            if 'à' in term:
-                search_variants.append(term.replace('à', 'a'))
-            if 'è' in term:
-                search_variants.append(term.replace('è', 'e'))
-            if 'é' in term:
-                search_variants.append(term.replace('é', 'e'))
-            if 'ì' in term:
-                search_variants.append(term.replace('ì', 'i'))
-            if 'ò' in term:
-                search_variants.append(term.replace('ò', 'o'))
-            if 'ù' in term:
-                search_variants.append(term.replace('ù', 'u'))
+            # Add ASCII-folded variant (strips accents and combining marks)
+            ascii_term = unicodedata.normalize('NFKD', term).encode('ascii', 'ignore').decode('ascii')
+            if ascii_term != term:
+                search_variants.append(ascii_term)
         
             # Try each search variant
             for search_term in search_variants:
                 try:
-                    query = f'[out:json]; way[name~"{search_term}",i]({south},{west},{north},{east}); out geom;'
+                    query = f'[out:json]; way[name~"{search_term}",i]({south},{west},{north},{east}); out tags geom;'
                     
-                    response = self.session.post(
-                        "http://overpass-api.de/api/interpreter", 
-                        data=query, timeout=30
-                    )
-                    time.sleep(1.0)
+                    data = self._overpass_post(query)
                     
-                    if response.status_code == 200:
-                        elements = response.json().get('elements', [])
+                    if data is not None:
+                        elements = data.get('elements', [])
                         if search_term != term:
-                            print(f"         📍 Search with accent variant '{search_term}' found {len(elements)} results")
+                            logger.debug("         📍 Search with accent variant '%s' found %d results", search_term, len(elements))
                         else:
-                            print(f"         📍 Direct search with '{search_term}' found {len(elements)} results")
+                            logger.debug("         📍 Direct search with '%s' found %d results", search_term, len(elements))
                         
                         if elements:
                             geometries = []
                             for elem in elements:
-                                if elem.get('type') == 'node':
-                                    lat, lon = elem.get('lat'), elem.get('lon')
-                                    if lat and lon:
-                                        geometries.append({'type': 'Point', 'coordinates': [lat, lon]})
-                                elif 'geometry' in elem and elem['geometry']:
-                                    coords = [[p['lat'], p['lon']] for p in elem['geometry']]
-                                    if len(coords) > 1:
-                                        is_closed = (len(coords) > 3 and 
-                                                abs(coords[0][0] - coords[-1][0]) < 0.00001 and 
-                                                abs(coords[0][1] - coords[-1][1]) < 0.00001)
-                                        
-                                        elem_tags = elem.get('tags', {})
-                                        elem_name = elem_tags.get('name', '').lower()
-                                        
-                                        if (is_closed or 'piazza' in elem_name or 
-                                            elem_tags.get('amenity') == 'marketplace'):
-                                            if not is_closed:
-                                                coords.append(coords[0])
-                                            geometries.append({'type': 'Polygon', 'coordinates': [coords]})
-                                        else:
-                                            geometries.append({'type': 'LineString', 'coordinates': coords})
+                                elem_name = elem.get('tags', {}).get('name', '')
+                                geometry = self._element_to_geometry(elem, elem_name)
+                                if geometry:
+                                    geometries.append(geometry)
                             
                             if geometries:
                                 # Apply zone filtering if needed
@@ -659,7 +937,7 @@ class CoordinatesFetcher:
                                     return geometries
                                     
                 except Exception as e:
-                    print(f"         ❌ Error in direct search with '{search_term}': {e}")
+                    logger.warning("         ❌ Error in direct search with '%s': %s", search_term, e)
                     continue
         
         return []
@@ -669,60 +947,63 @@ class CoordinatesFetcher:
         """Fetch civic address coordinates with zone filtering"""
         south, west, north, east = city.default_bbox
         variants = self._generate_variants(street, city)
+        if not variants:
+            return False
         
-        for variant in variants:
-            try:
-                escaped_variant = variant.replace('"', '\\"')
-                query = f"""
-                [out:json][timeout:25];
-                (
-                node["addr:street"="{escaped_variant}"]["addr:housenumber"="{civic_num}"]({south},{west},{north},{east});
-                way["addr:street"="{escaped_variant}"]["addr:housenumber"="{civic_num}"]({south},{west},{north},{east});
-                );
-                out geom;
-                """
-                
-                response = self.session.post(
-                    "http://overpass-api.de/api/interpreter", 
-                    data=query, timeout=30
-                )
-                time.sleep(1.0)
-                
-                if response.status_code == 200:
-                    geometries = []
-                    for elem in response.json().get('elements', []):
-                        if elem.get('type') == 'node':
-                            lat, lon = elem.get('lat'), elem.get('lon')
-                            if lat and lon and self._is_inside_bbox([lat, lon], city.default_bbox):
-                                geometries.append({'type': 'Point', 'coordinates': [lat, lon]})
-                        elif elem.get('type') == 'way' and 'geometry' in elem:
-                            geom = elem['geometry']
-                            if geom:
-                                lat, lon = geom[0]['lat'], geom[0]['lon']
-                                if self._is_inside_bbox([lat, lon], city.default_bbox):
-                                    geometries.append({'type': 'Point', 'coordinates': [lat, lon]})
-                        
-            except Exception:
+        # Test all variants in one query with a regex alternation on addr:street
+        street_regex = '|'.join(_escape_overpass_regex(variant) for variant in variants)
+        query = f"""
+        [out:json][timeout:25];
+        (
+        node["addr:street"~"^({street_regex})$"]["addr:housenumber"="{civic_num}"]({south},{west},{north},{east});
+        way["addr:street"~"^({street_regex})$"]["addr:housenumber"="{civic_num}"]({south},{west},{north},{east});
+        );
+        out center;
+        """
+        
+        try:
+            data = self._overpass_post(query)
+        except Exception:
+            data = None
+        
+        # Group matches inside the city bbox by street name so variant priority is preserved,
+        # noting in the same pass whether each point also falls inside any of the zone bboxes
+        by_street = {}
+        for elem in (data or {}).get('elements', []):
+            if elem.get('type') == 'node':
+                lat, lon = elem.get('lat'), elem.get('lon')
+                if not (lat and lon):
+                    continue
+            elif elem.get('type') == 'way' and elem.get('center'):
+                # Only one point per building is kept, so ask for its center instead of the full outline
+                lat, lon = elem['center']['lat'], elem['center']['lon']
+            else:
                 continue
-
-            if geometries:
-                break
-        if geometries:
-            # Filter by zone bboxes if available
-            if zone_bboxes:
-                all_filtered = []
-                for zone_bbox in zone_bboxes:
-                    filtered_geoms, _ = self._filter_geometries(geometries, zone_bbox, "zone")
-                    all_filtered.extend(filtered_geoms)
-                # Remove duplicates
-                unique_geoms = []
-                for geom in all_filtered:
-                    if geom not in unique_geoms:
-                        unique_geoms.append(geom)
-                geometries = unique_geoms
-
-                return True
+            
+            if not (south <= lat <= north and west <= lon <= east):
+                continue
+            in_zone = not zone_bboxes or any(z_south <= lat <= z_north and z_west <= lon <= z_east
+                                             for z_south, z_west, z_north, z_east in zone_bboxes)
+            street_name = elem.get('tags', {}).get('addr:street')
+            by_street.setdefault(street_name, []).append(((lat, lon), in_zone))
+        
+        matches = next((by_street[variant] for variant in variants if variant in by_street), None)
+        if not matches:
             return False
+        
+        # Keep in-zone points, without duplicates (first occurrence wins)
+        points = list(dict.fromkeys(point for point, in_zone in matches if in_zone))
+        zone_filtered_count = sum(not in_zone for _, in_zone in matches)
+        if zone_filtered_count:
+            self._count('zone_filtered', zone_filtered_count)
+        
+        if points:
+            self._update_cache(cache_key, {
+                'type': 'civic',
+                'geometries': [{'type': 'Point', 'coordinates': point} for point in points]
+            })
+        # The address exists in the city even when the zones filter out all of its points
+        return True
 
     def fetch_place(self, place_name: str, city_prefix: str, zones_info: Dict[str, Set[str]]) -> bool:
         """Fetch coordinates for a place with zone-based filtering"""
@@ -730,94 +1011,88 @@ class CoordinatesFetcher:
         cache_key = f"{city_prefix}_{place_name}"
         
         # Check cache first - if we have coordinates for this city, use them
-        if cache_key in self.cache:
-            cached = self.cache[cache_key]
-            if cached and cached.get('geometries') and len(cached['geometries']) > 0:
-                # We have valid cached coordinates for this city - use them
-                self.stats['cached'] += 1
-                return True
+        if self._has_geometries(cache_key):
+            cached = self._lookup_cache(cache_key)
+            # Store normalized hits under the exact name too, which is what the embedder looks up
+            if self.cache.get(cache_key) is not cached:
+                self._update_cache(cache_key, cached)
+            self._count('cached')
+            return True
         
         # Get zone bboxes for this place (only if we need to fetch new data)
         city = CITIES[city_prefix]
         zone_bboxes = []
         
         for zone_name in zones_info.get(place_name, set()):
-            zone_bbox = get_zone_bbox(city, zone_name)
+            zone_bbox = _zone_bbox_cached(city_prefix, zone_name)
             if zone_bbox:
                 zone_bboxes.append(zone_bbox)
 
         zones_str = ", ".join(zones_info.get(place_name, set()))
-        print(f"      🔍 Fetching: {place_name} (zones: {zones_str})")
+        logger.info("      🔍 Fetching: %s (zones: %s)", place_name, zones_str)
         
         # Check if civic address
-        civico_match = re.search(r'^(.+?)\s+civico\s+(\d+)$', place_name)
+        civico_match = _CIVICO_DIRECT.match(place_name)
         if civico_match:
             street, civic_num = civico_match.group(1).strip(), civico_match.group(2)
             if self._fetch_civic(cache_key, street, civic_num, city, zone_bboxes):
-                print(f"         🏠 Found civic address")
-                self.stats['fetched'] += 1
+                logger.info("         🏠 Found civic address")
+                self._count('fetched')
                 return True
             else:
-                print(f"         ❌ Civic not found")
-                self.stats['failed'] += 1
+                logger.info("         ❌ Civic not found")
+                self._count('failed')
                 return False
         
         # Normal place (street, square, etc.)
+        place_type = 'square' if 'piazza' in place_name.lower() else 'street'
+        zone_union = union_bboxes(zone_bboxes) if zone_bboxes else None
         variants = self._generate_variants(place_name, city)
         
-        print(f"         🔄 Trying variants: {', '.join(variants[:])}")
+        logger.debug("         🔄 Trying variants: %s", ', '.join(variants))
         
         for variant in variants:
-            osm_ids = self._search_nominatim(variant, city)
-            if osm_ids:
+            # Use exact-name geometries from the batch lookup when available
+            all_geometries = self._batched_geometries.get((city_prefix, variant))
+            if not all_geometries:
                 all_geometries = []
-                for osm_id in osm_ids:
+                for osm_id in self._search_nominatim(variant, city):
                     geometries = self._get_geometry(osm_id, city, place_name)  # Pass original place name
                     all_geometries.extend(geometries)
-                            
-                if all_geometries:
-                    # First filter to city bbox
-                    city_filtered, city_filtered_count = self._filter_geometries(
-                        all_geometries, city.default_bbox, "city"
-                    )
-                    
-                    # Then filter to zone bboxes if available
-                    final_geometries = city_filtered
-                    if zone_bboxes and city_filtered:
-                        union_bbox = union_bboxes(zone_bboxes)
-                        final_geometries, zone_filtered_count = self._filter_geometries(
-                            city_filtered, union_bbox, "zone"
-                        )
-                        if zone_filtered_count > 0:
-                            print(f"         🎯 Zone-filtered {zone_filtered_count} coords")
-                    
-                    if final_geometries:
-                        place_type = 'square' if any('piazza' in place_name.lower() for _ in [1]) else 'street'
-                        self.cache[cache_key] = {
-                            'type': place_type,
-                            'geometries': final_geometries
-                        }
-                        print(f"         ✅ Found with variant '{variant}': {len(final_geometries)} geometries")
-                        if city_filtered_count > 0:
-                            print(f"         🗑️ City-filtered {city_filtered_count} coords")
-                        self.stats['fetched'] += 1
-                        return True
-
-        print(f"         🔄 Nominatim failed, trying direct Overpass search...")
+            
+            if all_geometries:
+                # Filter to the city bbox and, if available, the zone bboxes in one pass
+                final_geometries, city_filtered_count, zone_filtered_count = self._filter_geometries_multi(
+                    all_geometries, city.default_bbox, zone_union
+                )
+                if zone_filtered_count > 0:
+                    logger.debug("         🎯 Zone-filtered %d coords", zone_filtered_count)
+                
+                if final_geometries:
+                    self._update_cache(cache_key, {
+                        'type': place_type,
+                        'geometries': final_geometries
+                    })
+                    logger.info("         ✅ Found with variant '%s': %d geometries", variant, len(final_geometries))
+                    if city_filtered_count > 0:
+                        logger.debug("         🗑️ City-filtered %d coords", city_filtered_count)
+                    self._count('fetched')
+                    return True
+
+        logger.debug("         🔄 Nominatim failed, trying direct Overpass search...")
         direct_geometries = self._search_overpass_direct(place_name, city, zone_bboxes)
         
         if direct_geometries:
-            place_type = 'square' if 'piazza' in place_name.lower() else 'street'
-            self.cache[place_name] = {
+            self._update_cache(place_name, {
                 'type': place_type,
                 'geometries': direct_geometries
-            }
-            print(f"         ✅ Found via direct Overpass: {len(direct_geometries)} geometries")
-            self.stats['fetched'] += 1
+            })
+            logger.info("         ✅ Found via direct Overpass: %d geometries", len(direct_geometries))
+            self._count('fetched')
             return True
         
-        print(f"         ❌ Not found after trying {len(variants)} variants")
-        self.stats['failed'] += 1
+        logger.info("         ❌ Not found after trying %d variants", len(variants))
+        self._count('failed')
         return False
         
     def process_ordinances(self):
@@ -833,8 +1108,12 @@ class CoordinatesFetcher:
             print("❌ ordinanze.json not found")
             return
         
-        # Extract all unique elements and track their zones
+        # Extract all unique elements and track their zones, grouping by city in the same pass
         all_elements = {}  # element_name -> {city: city_prefix, zones: set of zone names}
+        by_city = {}  # city_prefix -> elements, in first-seen order
+        zones_info = {}  # element -> set of zones
+        city_zones = {}  # city_prefix -> zones of the elements grouped under that city
+        spec_elements = {}  # specification -> extracted elements; specifications repeat across zones and ordinances
         
         print("🔍 Parsing ordinances...")
         start = 0
@@ -848,55 +1127,60 @@ class CoordinatesFetcher:
             
             for zone_name, locations in ord_data['zones'].items():
                 for specification in locations:
-                    elements = self.extract_elements(specification)
+                    elements = spec_elements.get(specification)
+                    if elements is None:
+                        elements = spec_elements[specification] = self.extract_elements(specification)
                     for element in elements:
-                        if element not in all_elements:
-                            all_elements[element] = {
+                        info = all_elements.get(element)
+                        if info is None:
+                            info = all_elements[element] = {
                                 'city': city_prefix,
                                 'zones': set()
                             }
-                        all_elements[element]['zones'].add(zone_name)
+                            by_city.setdefault(city_prefix, []).append(element)
+                            zones_info[element] = info['zones']
+                        info['zones'].add(zone_name)
+                        city_zones.setdefault(info['city'], set()).add(zone_name)
         
         print(f"📊 Found {len(all_elements)} unique elements")
         
-        # Group by city and process
-        by_city = {}
-        zones_info = {}  # element -> set of zones
-        
-        for element, info in all_elements.items():
-            city = info['city']
-            if city not in by_city:
-                by_city[city] = []
-            by_city[city].append(element)
-            zones_info[element] = info['zones']
-        
-        # Process each city
-        for city_prefix, elements in by_city.items():
-            city_name = CITIES[city_prefix].city_name
-            print(f"\n🏛️ {city_name}: {len(elements)} elements")
-            
-            # Count zones with bboxes
-            city_config = CITIES[city_prefix]
-            zones_with_bbox = set()
-            total_zones = set()
-            
-            for element in elements:
-                for zone_name in zones_info[element]:
-                    total_zones.add(zone_name)
-                    if get_zone_bbox(city_config, zone_name):
-                        zones_with_bbox.add(zone_name)
-            
-            print(f"   📍 {len(zones_with_bbox)}/{len(total_zones)} zones have bboxes")
-            
-            for i, element in enumerate(elements):
-                print(f"\n[{i+1}/{len(elements)}] {element}")
-                self.fetch_place(element, city_prefix, zones_info)
+        # Process each city (the listener is stopped before the summary so progress lines come first)
+        listener = _start_log_listener()
+        try:
+            for city_prefix, elements in by_city.items():
+                city_name = CITIES[city_prefix].city_name
+                logger.info("\n🏛️ %s: %d elements", city_name, len(elements))
+                
+                # Count zones with bboxes
+                city_config = CITIES[city_prefix]
+                total_zones = city_zones[city_prefix]
+                zones_with_bbox = [zone_name for zone_name in total_zones if _zone_bbox_cached(city_prefix, zone_name)]
+                
+                logger.info("   📍 %d/%d zones have bboxes", len(zones_with_bbox), len(total_zones))
+                
+                # Resolve exact-name matches for the places fetch_place will look up, in batched
+                # queries; only the first variant (the full name) is queued, so bare base names
+                # and special-case rewrites still go through Nominatim as before
+                for element in elements:
+                    if self._has_geometries(f"{city_prefix}_{element}") or _CIVICO_DIRECT.match(element):
+                        continue
+                    variants = self._generate_variants(element, city_config)
+                    if variants:
+                        self.queue_place(variants[0], city_prefix)
+                self.flush()
                 
-                # Save progress every 10
-                if (i + 1) % 10 == 0:
-                    self._save_cache()
+                # Fetch concurrently; per-endpoint rate limiters and slot semaphores bound the load on each API
+                with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+                    results = executor.map(lambda e: self.fetch_place(e, city_prefix, zones_info), elements)
+                    found_count = 0
+                    for i, found in enumerate(results, 1):
+                        found_count += bool(found)
+                        if i % PROGRESS_EVERY == 0 or i == len(elements):
+                            logger.info("\n   ⏳ [%d/%d] %d found, %d not found", i, len(elements), found_count, i - found_count)
+        finally:
+            _stop_log_listener(listener)
         
-        # Final save and stats
+        # Compact update log into the cache file and print stats
         self._save_cache()
         
         print(f"\n🎉 COMPLETE!")
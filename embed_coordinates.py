@@ -1,31 +1,257 @@
+import bisect
 import json
 import math
+import mmap
+import os
 import re
-from typing import List, Dict, Tuple, Optional, Set
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Dict, Tuple, Optional, Set
 
 # Import city configurations
 from city_configs import CITIES, CITY_PREFIXES, CityConfig
 
-def calculate_distance(coord1: Tuple[float, float], coord2: Tuple[float, float]) -> float:
-    """Calculate distance between coordinates using Haversine formula"""
+# Length of one degree of latitude in meters (Haversine sphere, R = 6371 km)
+METERS_PER_DEGREE = 6371 * 1000 * math.pi / 180
+
+# Below this many point pairs, find_closest_pair scans all pairs instead of building a grid
+GRID_MIN_PAIRS = 256
+
+# Intersections and tracts needed before process_all_ordinances spreads work over processes
+PARALLEL_MIN_COMPUTED = 100
+
+# Squared planar distances within this factor of the best one are re-checked with haversine
+# (widened by the longitude-scale spread when the points span a wider latitude band)
+PLANAR_MARGIN = 1.01
+
+# Specification patterns, compiled once for parse_specification (match() anchors at the start)
+_TRATTO_RE = re.compile(r'(.+?)\s+tratto compreso tra (.+?)$')
+_CIVICO_RE = re.compile(r'(.+?)\s*\(fronte civico (\d+)\)$')
+_INCROCIO_RE = re.compile(r'(.+?)\s+incrocio con (.+?)$')
+
+# Zone bbox given to "no_" zones: it matches no real coordinate, so filters skip the scan
+_EMPTY_BBOX = (0, 0, 0, 0)
+
+# The viewer's coordinates fetch statement, replaced by embed_into_html with the embedded data
+_FETCH_RE = re.compile(rb'coordinatesData = await fetch\([^)]+\)[^;]+;')
+
+# Per-specification debug output (civic lookups, Via Padova tract), enabled with EMBED_DEBUG=1
+DEBUG = os.environ.get('EMBED_DEBUG') == '1'
+
+def _haversine_a(coord1: Tuple[float, float], coord2: Tuple[float, float]) -> float:
+    """Haversine term a (monotonic in distance, enough for comparing distances)"""
     lat1, lon1 = coord1
     lat2, lon2 = coord2
     
-    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
+    # Local aliases skip the math attribute lookups on this scalar path
+    sin, cos, radians = math.sin, math.cos, math.radians
+    lat1, lon1, lat2, lon2 = radians(lat1), radians(lon1), radians(lat2), radians(lon2)
     
     dlat = lat2 - lat1
     dlon = lon2 - lon1
-    a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
+    return sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
+
+def calculate_distance(coord1: Tuple[float, float], coord2: Tuple[float, float]) -> float:
+    """Calculate distance between coordinates using Haversine formula"""
+    a = _haversine_a(coord1, coord2)
     c = 2 * math.asin(math.sqrt(a))
     
     return 6371 * c * 1000  # Distance in meters
 
+def great_circle_midpoint(coord1: Tuple[float, float], coord2: Tuple[float, float]) -> Tuple[float, float]:
+    """Midpoint of the great-circle arc between two coordinates"""
+    # Streets sharing a node meet exactly there; skip the round trip through radians
+    if coord1 == coord2:
+        return coord1[0], coord1[1]
+    lat1, lon1, lat2, lon2 = map(math.radians, (coord1[0], coord1[1], coord2[0], coord2[1]))
+    cos_lat2 = math.cos(lat2)
+    bx = cos_lat2 * math.cos(lon2 - lon1)
+    by = cos_lat2 * math.sin(lon2 - lon1)
+    cos_lat1 = math.cos(lat1)
+    mid_lat = math.atan2(math.sin(lat1) + math.sin(lat2), math.hypot(cos_lat1 + bx, by))
+    mid_lon = lon1 + math.atan2(by, cos_lat1 + bx)
+    return math.degrees(mid_lat), math.degrees(mid_lon)
+
+def _half_radians(points: List[Tuple[float, float]]) -> List[Tuple[float, float, float]]:
+    """Convert points to (lat/2, lon/2, cos(lat)) in radians, the per-point part of the haversine term"""
+    radians, cos = math.radians, math.cos
+    return [(lat / 2, lon / 2, cos(lat)) for lat, lon in
+            ((radians(lat), radians(lon)) for lat, lon in points)]
+
+def find_closest_pair(points1: List[Tuple[float, float]], points2: List[Tuple[float, float]], max_distance: Optional[float] = None) -> Tuple[Optional[Tuple[float, float]], Optional[Tuple[float, float]], float]:
+    """Find the closest pair of points between two lists, returning (point1, point2, distance in meters).
+    
+    With max_distance, only pairs that may be closer than max_distance are compared
+    (bbox overlap, plus a grid index for larger inputs); the pair found is exact if one
+    exists below that distance, and callers should compare the returned distance.
+    """
+    if not points1 or not points2:
+        return None, None, float('inf')
+    
+    use_grid = False
+    if max_distance is not None:
+        # Degree spans that any pair closer than max_distance must fall within
+        max_abs_lat = max(abs(lat) for lat, _ in points1 + points2)
+        cell_lat = max_distance / METERS_PER_DEGREE * 1.001
+        cell_lon = cell_lat / max(math.cos(math.radians(max_abs_lat)), 1e-9)
+        
+        # Bbox pre-filter: only points inside the overlap of both bboxes (inflated by
+        # max_distance) can pair up; disjoint bboxes mean no pair is close enough
+        lats1, lons1 = [lat for lat, _ in points1], [lon for _, lon in points1]
+        lats2, lons2 = [lat for lat, _ in points2], [lon for _, lon in points2]
+        south = max(min(lats1), min(lats2)) - cell_lat
+        north = min(max(lats1), max(lats2)) + cell_lat
+        west = max(min(lons1), min(lons2)) - cell_lon
+        east = min(max(lons1), max(lons2)) + cell_lon
+        if south > north or west > east:
+            return None, None, float('inf')
+        points1 = [p for p in points1 if south <= p[0] <= north and west <= p[1] <= east]
+        points2 = [p for p in points2 if south <= p[0] <= north and west <= p[1] <= east]
+        if not points1 or not points2:
+            return None, None, float('inf')
+        
+        # For few pairs a full scan is cheaper than building the grid
+        use_grid = len(points1) * len(points2) >= GRID_MIN_PAIRS
+    
+    if use_grid:
+        # Bucket points2 in cells at least max_distance wide: any pair closer than
+        # max_distance lies in the same or an adjacent cell
+        grid = {}
+        for j, (lat, lon) in enumerate(points2):
+            grid.setdefault((math.floor(lat / cell_lat), math.floor(lon / cell_lon)), []).append(j)
+        
+        def candidates(lat, lon):
+            row, col = math.floor(lat / cell_lat), math.floor(lon / cell_lon)
+            return [j for r in (row - 1, row, row + 1) for c in (col - 1, col, col + 1)
+                    for j in grid.get((r, c), ())]
+    else:
+        all_indices = range(len(points2))
+        
+        def candidates(lat, lon):
+            return all_indices
+    
+    # Local names avoid a module attribute lookup per pair in the inner loop
+    sin, asin, sqrt = math.sin, math.asin, math.sqrt
+    
+    # Pairs are first ranked on an equirectangular projection (longitudes scaled by
+    # the cosine of the mean latitude): a squared planar distance with no trig per pair
+    all_lats = [lat for lat, _ in points1 + points2]
+    mean_lat = math.radians(sum(all_lats) / len(all_lats))
+    scale = math.cos(mean_lat)
+    planar2 = [(lat, lon * scale) for lat, lon in points2]
+    
+    min_d2 = float('inf')
+    rows = []
+    for i, (lat1, lon1) in enumerate(points1):
+        indices = candidates(lat1, lon1)
+        if not indices:
+            continue
+        lon1 *= scale
+        # Whole row in one comprehension, minimum found by the builtin min()
+        row = [(lat2 - lat1)**2 + (lon2 - lon1)**2 for lat2, lon2 in map(planar2.__getitem__, indices)]
+        row_min = min(row)
+        rows.append((i, indices, row, row_min))
+        if row_min < min_d2:
+            min_d2 = row_min
+            # Crossing streets usually share an OSM node; nothing can beat distance zero
+            if min_d2 == 0.0:
+                break
+    
+    if not rows:
+        return None, None, float('inf')
+    
+    # The single longitude scale is off by at most the cosine ratio across the latitude
+    # band, so pairs within that spread (squared) of the planar winner are re-ranked by
+    # the haversine term a; asin/sqrt are only applied to the final pair. This is exact
+    # within city-scale extents, where earth curvature is negligible next to the margin
+    low, high = min(all_lats), max(all_lats)
+    cos_max = 1.0 if low <= 0.0 <= high else math.cos(math.radians(min(abs(low), abs(high))))
+    cos_min = max(math.cos(math.radians(max(abs(low), abs(high)))), 1e-9)
+    bound = min_d2 * PLANAR_MARGIN * (cos_max / cos_min) ** 2
+    radians = math.radians
+    min_a = float('inf')
+    best_i = best_j = None
+    for i, indices, row, row_min in rows:
+        if row_min > bound:
+            continue
+        lat1, lon1 = radians(points1[i][0]), radians(points1[i][1])
+        cos1 = math.cos(lat1)
+        for k, d2 in enumerate(row):
+            if d2 > bound:
+                continue
+            lat2, lon2 = radians(points2[indices[k]][0]), radians(points2[indices[k]][1])
+            a = sin((lat2 - lat1) / 2)**2 + cos1 * math.cos(lat2) * sin((lon2 - lon1) / 2)**2
+            if a < min_a:
+                min_a = a
+                best_i, best_j = i, indices[k]
+    
+    return points1[best_i], points2[best_j], 6371 * (2 * asin(sqrt(min_a))) * 1000
+
+def find_nearest_points(points: List[Tuple[float, float]], target_sets: List[List[Tuple[float, float]]]) -> List[Optional[Tuple[float, float]]]:
+    """For each list of targets, find the point in points closest to any of them.
+    
+    The radians and cosines of points are computed once and shared by all target lists,
+    and points are sorted by latitude so each target only scans the band that can still
+    beat the best pair found so far. Ties go to the earliest point, as in a full scan.
+    """
+    sin, asin, sqrt = math.sin, math.asin, math.sqrt
+    points_rad = _half_radians(points)
+    order = sorted(range(len(points_rad)), key=lambda i: points_rad[i][0])
+    lats = [points_rad[i][0] for i in order]
+    
+    nearest = []
+    for targets in target_sets:
+        if not targets:
+            nearest.append(None)
+            continue
+        # Only the nearest point is needed, so compare the haversine term a directly
+        min_a = float('inf')
+        best_i = None
+        # a >= sin(half latitude difference)**2, so points further than reach in half-latitude
+        # cannot beat min_a; the slack keeps exact ties inside the band
+        reach = float('inf')
+        for lat2, lon2, cos2 in _half_radians(targets):
+            start = bisect.bisect_left(lats, lat2)
+            # Walk outward from the target's latitude, north then south, until out of reach
+            for k, stop, step in ((start, len(order), 1), (start - 1, -1, -1)):
+                while k != stop:
+                    i = order[k]
+                    lat1, lon1, cos1 = points_rad[i]
+                    if abs(lat1 - lat2) > reach:
+                        break
+                    a = sin(lat2 - lat1)**2 + cos1 * cos2 * sin(lon2 - lon1)**2
+                    if a < min_a or (a == min_a and i < best_i):
+                        min_a = a
+                        best_i = i
+                        reach = asin(sqrt(min(min_a, 1.0))) + 1e-12
+                    k += step
+        nearest.append(points[best_i] if best_i is not None else None)
+    return nearest
+
 def is_coordinate_in_bbox(coord: Tuple[float, float], bbox: Tuple[float, float, float, float]) -> bool:
     """Check if coordinate is within bounding box"""
     lat, lon = coord
     min_lat, min_lon, max_lat, max_lon = bbox
     return min_lat <= lat <= max_lat and min_lon <= lon <= max_lon
 
+# city name -> zone key indexes used by get_zone_bbox, built on first lookup for that city
+_zone_indexes = {}
+
+def _zone_index(city_config: CityConfig) -> Tuple[Dict[str, str], List[Tuple[str, str]], List[Tuple[str, str]], List[Tuple[str, str]]]:
+    """Lowercased and cleaned zone keys of a city, computed once instead of on every lookup"""
+    index = _zone_indexes.get(city_config.city_name)
+    if index is None:
+        lower_bboxes = {}
+        for bbox_zone in city_config.zone_bboxes:
+            lower_bboxes.setdefault(bbox_zone.lower(), bbox_zone)
+        lower_mappings = [(mapping_key.lower(), mapped_zone)
+                          for mapping_key, mapped_zone in city_config.zone_mappings.items()]
+        cleaned_bboxes = [(bbox_zone.lower().replace('stazione_', '').replace('zona_', ''), bbox_zone)
+                          for bbox_zone in city_config.zone_bboxes]
+        cleaned_mappings = [(mapping_lower.replace('stazione_', '').replace('zona_', '').replace('_', ' '), mapped_zone)
+                            for mapping_lower, mapped_zone in lower_mappings]
+        index = _zone_indexes[city_config.city_name] = (lower_bboxes, lower_mappings, cleaned_bboxes, cleaned_mappings)
+    return index
+
 def get_zone_bbox(city_config: CityConfig, zone_name: str) -> Optional[Tuple[float, float, float, float]]:
     """Get bounding box for a zone, handling zone mappings"""
     # First check direct zone name
@@ -38,15 +264,16 @@ def get_zone_bbox(city_config: CityConfig, zone_name: str) -> Optional[Tuple[flo
         if mapped_zone in city_config.zone_bboxes:
             return city_config.zone_bboxes[mapped_zone]
     
+    lower_bboxes, lower_mappings, cleaned_bboxes, cleaned_mappings = _zone_index(city_config)
+    
     # Check case-insensitive matches
     zone_lower = zone_name.lower()
-    for bbox_zone in city_config.zone_bboxes:
-        if bbox_zone.lower() == zone_lower:
-            return city_config.zone_bboxes[bbox_zone]
+    if zone_lower in lower_bboxes:
+        return city_config.zone_bboxes[lower_bboxes[zone_lower]]
     
     # Check partial matches in mappings
-    for mapping_key, mapped_zone in city_config.zone_mappings.items():
-        if zone_lower in mapping_key.lower() or mapping_key.lower() in zone_lower:
+    for mapping_lower, mapped_zone in lower_mappings:
+        if zone_lower in mapping_lower or mapping_lower in zone_lower:
             if mapped_zone in city_config.zone_bboxes:
                 return city_config.zone_bboxes[mapped_zone]
     
@@ -54,14 +281,12 @@ def get_zone_bbox(city_config: CityConfig, zone_name: str) -> Optional[Tuple[flo
     zone_clean = zone_lower.replace('.', '').replace('ff.ss.', '').replace('stazione', '').strip()
     
     # Check if cleaned zone name matches any bbox keys
-    for bbox_zone in city_config.zone_bboxes:
-        bbox_clean = bbox_zone.lower().replace('stazione_', '').replace('zona_', '')
+    for bbox_clean, bbox_zone in cleaned_bboxes:
         if zone_clean in bbox_clean or bbox_clean in zone_clean:
             return city_config.zone_bboxes[bbox_zone]
     
     # Check mappings with cleaned names
-    for mapping_key, mapped_zone in city_config.zone_mappings.items():
-        mapping_clean = mapping_key.lower().replace('stazione_', '').replace('zona_', '').replace('_', ' ')
+    for mapping_clean, mapped_zone in cleaned_mappings:
         if zone_clean in mapping_clean or mapping_clean in zone_clean:
             if mapped_zone in city_config.zone_bboxes:
                 return city_config.zone_bboxes[mapped_zone]
@@ -79,32 +304,43 @@ def extract_all_coordinates(place_data: Dict, zone_bbox: Optional[Tuple[float, f
             coords = coords[0]  # Outer ring
             
         if geom["type"] == "Point":      
-            # Single point, coordinates is a list of 2 floats
-            if isinstance(geom["coordinates"], list) and len(geom["coordinates"]) == 2:
-                coords.append(geom["coordinates"])
+            # Single point, coordinates is a pair of floats (a tuple once compacted); collect
+            # it without touching the catalog entry (appending to it made the list contain itself)
+            if isinstance(coords, (list, tuple)) and len(coords) == 2:
+                points.append((coords[0], coords[1]))
         else:
-            for coord in coords:
-                if len(coord) >= 2:
-                    point = (coord[0], coord[1])
-                    # Filter by zone bbox if provided
-                    if zone_bbox is None or is_coordinate_in_bbox(point, zone_bbox):
-                        points.append(point)
+            points.extend((coord[0], coord[1]) for coord in coords if len(coord) >= 2)
     
     # From special coordinates (Points)
     for special in place_data.get('special_coordinates', []):
         if special.get('type') == 'Point':
             coord = special.get('coordinates', [])
             if len(coord) >= 2:
-                point = (coord[0], coord[1])
-                # Filter by zone bbox if provided
-                if zone_bbox is None or is_coordinate_in_bbox(point, zone_bbox):
-                    points.append(point)
+                points.append((coord[0], coord[1]))
+    
+    # Filter by zone bbox if provided, in a single pass with the bounds unpacked once
+    if zone_bbox is not None:
+        min_lat, min_lon, max_lat, max_lon = zone_bbox
+        points = [point for point in points
+                  if min_lat <= point[0] <= max_lat and min_lon <= point[1] <= max_lon]
     
     return points
 
+def _unique_points(place_data: Dict, zone_bbox: Optional[Tuple[float, float, float, float]] = None) -> List[Tuple[float, float]]:
+    """Points of a place inside the zone bbox, without repeated vertices"""
+    # Ways sharing a node repeat its coordinates; exact duplicates can't change any nearest search
+    return list(dict.fromkeys(extract_all_coordinates(place_data, zone_bbox)))
+
 def filter_geometries_by_bbox(geometries: List[Dict], zone_bbox: Tuple[float, float, float, float]) -> List[Dict]:
     """Filter geometries to only include coordinates within the zone bbox"""
+    # Only geometries kept as is (not LineString/Polygon) survive the empty bbox
+    if zone_bbox == _EMPTY_BBOX:
+        return [geom for geom in geometries
+                if geom.get('coordinates') and geom.get('type') not in ('LineString', 'Polygon')]
+    
     filtered_geometries = []
+    # Unpack once; the bbox test is inlined below instead of calling is_coordinate_in_bbox per point
+    min_lat, min_lon, max_lat, max_lon = zone_bbox
     
     for geom in geometries:
         if not geom.get('coordinates'):
@@ -115,37 +351,25 @@ def filter_geometries_by_bbox(geometries: List[Dict], zone_bbox: Tuple[float, fl
         
         if geom_type == 'LineString':
             # Filter LineString coordinates
-            filtered_coords = []
-            for coord in coords:
-                if len(coord) >= 2:
-                    point = (coord[0], coord[1])
-                    if is_coordinate_in_bbox(point, zone_bbox):
-                        filtered_coords.append(coord)
+            filtered_coords = [coord for coord in coords
+                               if len(coord) >= 2 and min_lat <= coord[0] <= max_lat and min_lon <= coord[1] <= max_lon]
             
             # Only keep geometry if it has coordinates in the bbox
+            # Build the filtered geometry in one dict display instead of copy() plus two item
+            # assignments; the other catalog keys (osm_id, is_tract_segment, ...) are carried over
             if filtered_coords:
-                filtered_geom = geom.copy()
-                filtered_geom['coordinates'] = filtered_coords
-                filtered_geom['bbox_filtered'] = True
-                filtered_geometries.append(filtered_geom)
+                filtered_geometries.append({**geom, 'coordinates': filtered_coords, 'bbox_filtered': True})
                 
         elif geom_type == 'Polygon':
             # Filter Polygon coordinates (outer ring)
             if coords and len(coords) > 0:
                 outer_ring = coords[0]
-                filtered_ring = []
-                for coord in outer_ring:
-                    if len(coord) >= 2:
-                        point = (coord[0], coord[1])
-                        if is_coordinate_in_bbox(point, zone_bbox):
-                            filtered_ring.append(coord)
+                filtered_ring = [coord for coord in outer_ring
+                                 if len(coord) >= 2 and min_lat <= coord[0] <= max_lat and min_lon <= coord[1] <= max_lon]
                 
                 # Only keep polygon if it has coordinates in the bbox
                 if len(filtered_ring) >= 3:  # Minimum for a valid polygon
-                    filtered_geom = geom.copy()
-                    filtered_geom['coordinates'] = [filtered_ring]
-                    filtered_geom['bbox_filtered'] = True
-                    filtered_geometries.append(filtered_geom)
+                    filtered_geometries.append({**geom, 'coordinates': [filtered_ring], 'bbox_filtered': True})
         else:
             # For other geometry types, keep as is for now
             filtered_geometries.append(geom)
@@ -154,49 +378,39 @@ def filter_geometries_by_bbox(geometries: List[Dict], zone_bbox: Tuple[float, fl
 
 def filter_special_coordinates_by_bbox(special_coords: List[Dict], zone_bbox: Tuple[float, float, float, float]) -> List[Dict]:
     """Filter special coordinates by zone bbox"""
+    if zone_bbox == _EMPTY_BBOX:
+        return [special for special in special_coords if special.get('type') != 'Point']
+    
     filtered_coords = []
+    min_lat, min_lon, max_lat, max_lon = zone_bbox
     
     for special in special_coords:
         if special.get('type') == 'Point':
             coord = special.get('coordinates', [])
             if len(coord) >= 2:
-                point = (coord[0], coord[1])
-                if is_coordinate_in_bbox(point, zone_bbox):
-                    filtered_special = special.copy()
-                    filtered_special['bbox_filtered'] = True
-                    filtered_coords.append(filtered_special)
+                if min_lat <= coord[0] <= max_lat and min_lon <= coord[1] <= max_lon:
+                    filtered_coords.append({**special, 'bbox_filtered': True})
         else:
             # Keep non-Point special coordinates as is
             filtered_coords.append(special)
     
     return filtered_coords
 
-def find_intersection_point(place1_data: Dict, place2_data: Dict, threshold: float = 100.0, zone_bbox: Optional[Tuple[float, float, float, float]] = None) -> Optional[Tuple[float, float]]:
+def find_intersection_point(place1_data: Dict, place2_data: Dict, threshold: float = 100.0, zone_bbox: Optional[Tuple[float, float, float, float]] = None,
+                            points_of: Callable = _unique_points) -> Optional[Tuple[float, float]]:
     """Find intersection point between two places, filtered by zone bbox"""
-    points1 = extract_all_coordinates(place1_data, zone_bbox)
-    points2 = extract_all_coordinates(place2_data, zone_bbox)
+    points1 = points_of(place1_data, zone_bbox)
+    points2 = points_of(place2_data, zone_bbox)
     
     if not points1 or not points2:
         return None
     
     # Find closest points between the two places
-    min_distance = float('inf')
-    best_point1 = None
-    best_point2 = None
-    
-    for p1 in points1:
-        for p2 in points2:
-            distance = calculate_distance(p1, p2)
-            if distance < min_distance:
-                min_distance = distance
-                best_point1 = p1
-                best_point2 = p2
+    best_point1, best_point2, min_distance = find_closest_pair(points1, points2, max_distance=threshold)
     
     # If points are close enough, create intersection point
     if min_distance < threshold and best_point1 and best_point2:
-        lat = (best_point1[0] + best_point2[0]) / 2
-        lon = (best_point1[1] + best_point2[1]) / 2
-        intersection_point = (lat, lon)
+        intersection_point = great_circle_midpoint(best_point1, best_point2)
         
         # Check if intersection point is in zone bbox
         if zone_bbox is None or is_coordinate_in_bbox(intersection_point, zone_bbox):
@@ -204,11 +418,12 @@ def find_intersection_point(place1_data: Dict, place2_data: Dict, threshold: flo
     
     return None
 
-def compute_tract_segment(street_data: Dict, endpoint1_data: Dict, endpoint2_data: Dict, margin: float = 0.0005, zone_bbox: Optional[Tuple[float, float, float, float]] = None) -> List[Dict]:
+def compute_tract_segment(street_data: Dict, endpoint1_data: Dict, endpoint2_data: Dict, margin: float = 0.0005, zone_bbox: Optional[Tuple[float, float, float, float]] = None,
+                          points_of: Callable = _unique_points) -> List[Dict]:
     """Compute street tract between two endpoints, filtered by zone bbox"""
-    street_points = extract_all_coordinates(street_data, zone_bbox)
-    endpoint1_points = extract_all_coordinates(endpoint1_data, zone_bbox)
-    endpoint2_points = extract_all_coordinates(endpoint2_data, zone_bbox)
+    street_points = points_of(street_data, zone_bbox)
+    endpoint1_points = points_of(endpoint1_data, zone_bbox)
+    endpoint2_points = points_of(endpoint2_data, zone_bbox)
     
     if not street_points or not endpoint1_points or not endpoint2_points:
         # Return filtered geometries if points are filtered out
@@ -217,19 +432,7 @@ def compute_tract_segment(street_data: Dict, endpoint1_data: Dict, endpoint2_dat
         return street_data.get('geometries', [])
     
     # Find nearest points on street to both endpoints
-    min_dist1, nearest_to_end1 = float('inf'), None
-    for street_point in street_points:
-        for end1_point in endpoint1_points:
-            dist = calculate_distance(street_point, end1_point)
-            if dist < min_dist1:
-                min_dist1, nearest_to_end1 = dist, street_point
-    
-    min_dist2, nearest_to_end2 = float('inf'), None
-    for street_point in street_points:
-        for end2_point in endpoint2_points:
-            dist = calculate_distance(street_point, end2_point)
-            if dist < min_dist2:
-                min_dist2, nearest_to_end2 = dist, street_point
+    nearest_to_end1, nearest_to_end2 = find_nearest_points(street_points, [endpoint1_points, endpoint2_points])
     
     if not nearest_to_end1 or not nearest_to_end2:
         if zone_bbox:
@@ -250,38 +453,65 @@ def compute_tract_segment(street_data: Dict, endpoint1_data: Dict, endpoint2_dat
         min_lon = max(min_lon, zone_min_lon)
         max_lon = min(max_lon, zone_max_lon)
     
-    # Filter street geometries to tract segment
+    # Filter street geometries to tract segment; an empty tract/zone overlap skips the scan entirely
     filtered_geometries = []
-    for geom in street_data.get('geometries', []):
-        if geom.get('type') != 'LineString':
-            continue
-        
-        filtered_coords = []
-        for coord in geom.get('coordinates', []):
-            if min_lat <= coord[0] <= max_lat and min_lon <= coord[1] <= max_lon:
-                filtered_coords.append(coord)
-        
-        if filtered_coords:
-            tract_geom = {
-                'type': 'LineString',
-                'coordinates': filtered_coords,
-                'osm_id': geom.get('osm_id'),
-                'is_tract_segment': True,
-                'bbox_filtered': True
-            }
-            filtered_geometries.append(tract_geom)
+    if min_lat <= max_lat and min_lon <= max_lon:
+        for geom in street_data.get('geometries', []):
+            if geom.get('type') != 'LineString':
+                continue
+            
+            filtered_coords = [coord for coord in geom.get('coordinates', [])
+                               if min_lat <= coord[0] <= max_lat and min_lon <= coord[1] <= max_lon]
+            
+            if filtered_coords:
+                tract_geom = {
+                    'type': 'LineString',
+                    'coordinates': filtered_coords,
+                    'osm_id': geom.get('osm_id'),
+                    'is_tract_segment': True,
+                    'bbox_filtered': True
+                }
+                filtered_geometries.append(tract_geom)
     
     return filtered_geometries if filtered_geometries else (
         filter_geometries_by_bbox(street_data.get('geometries', []), zone_bbox) if zone_bbox 
         else street_data.get('geometries', [])
     )
 
+# Embedder owned by each worker process of process_all_ordinances
+_worker_embedder = None
+
+def _init_worker(places_file: str, ordinances_file: str):
+    """Load the catalog once per worker process"""
+    global _worker_embedder
+    # The parent already reported the load; workers would repeat it once each
+    _worker_embedder = PlacesEmbedder(places_file, ordinances_file, quiet=True)
+
+def _process_in_worker(job: Tuple[str, str, str, Optional[CityConfig]]) -> Dict:
+    """Process one (specification, zone, ordinance, city) job in a worker process"""
+    return _worker_embedder.process_specification(*job)
+
 class PlacesEmbedder:
-    def __init__(self, places_file: str = "coordinates.json", ordinances_file: str = "ordinanze.json"):
+    def __init__(self, places_file: str = "coordinates.json", ordinances_file: str = "ordinanze.json", quiet: bool = False):
         self.places_file = places_file
         self.ordinances_file = ordinances_file
+        self.quiet = quiet  # Skip the "Loaded ..." messages (errors are still printed)
         self.places_catalog = {}
         self.ordinances = {}
+        # (city, street pair, zone bbox) -> intersection point, shared by repeated crossings
+        self._intersections = {}
+        # id(place data) -> (unique points, their latitudes sorted, point indices in that order)
+        self._place_index = {}
+        # (id(place data), zone bbox) -> points in the bbox; each place recurs across many specifications
+        self._zone_points = {}
+        # (place name, city name) -> catalog entry or None, and (city name, zone) -> bbox or None
+        self._place_lookups = {}
+        self._zone_bboxes = {}
+        # specification -> parse_specification result; the same strings recur across zones and ordinances
+        self._parsed_specs = {}
+        # One alternation of lowercased zone mapping keys per city, for detect_city_from_ordinance
+        self._city_patterns = [(config, re.compile('|'.join(re.escape(key.lower()) for key in config.zone_mappings)))
+                               for config in CITIES.values() if config.zone_mappings]
         
         # Load data
         self._load_places_catalog()
@@ -290,19 +520,64 @@ class PlacesEmbedder:
     def _load_places_catalog(self):
         """Load places catalog"""
         try:
-            with open(self.places_file, 'r', encoding='utf-8') as f:
-                self.places_catalog = json.load(f)
-            print(f"📦 Loaded {len(self.places_catalog)} places from {self.places_file}")
+            # Read raw bytes and parse in one call; json decodes UTF-8 itself, skipping the text layer
+            with open(self.places_file, 'rb') as f:
+                self.places_catalog = json.loads(f.read())
+            # Cached lookups and points refer to the previous catalog
+            self._place_lookups.clear()
+            self._place_index.clear()
+            self._zone_points.clear()
+            self._compact_coordinates()
+            if not self.quiet:
+                print(f"📦 Loaded {len(self.places_catalog)} places from {self.places_file}")
         except FileNotFoundError:
             print(f"❌ Places catalog not found: {self.places_file}")
             raise
     
+    def _compact_coordinates(self):
+        """Store Point, LineString and Polygon coordinates as (lat, lon) tuples, which are smaller than lists"""
+        for place in self.places_catalog.values():
+            if not isinstance(place, dict):
+                continue
+            for geom in place.get('geometries', []):
+                geom_type = geom.get('type')
+                if geom_type == 'Point':
+                    geom['coordinates'] = tuple(geom.get('coordinates', ()))
+                elif geom_type == 'LineString':
+                    geom['coordinates'] = list(map(tuple, geom.get('coordinates', [])))
+                elif geom_type == 'Polygon':
+                    geom['coordinates'] = [list(map(tuple, ring)) for ring in geom.get('coordinates', [])]
+    
+    def _place_points(self, place_data: Dict, zone_bbox: Optional[Tuple[float, float, float, float]] = None) -> List[Tuple[float, float]]:
+        """Same points as _unique_points, answered from a per-place latitude index"""
+        key = (id(place_data), zone_bbox)
+        cached = self._zone_points.get(key)
+        if cached is not None:
+            return cached
+        
+        index = self._place_index.get(id(place_data))
+        if index is None:
+            points = _unique_points(place_data)
+            order = sorted(range(len(points)), key=lambda i: points[i][0])
+            index = self._place_index[id(place_data)] = (points, [points[i][0] for i in order], order)
+        points, lats, order = index
+        if zone_bbox is not None:
+            # Binary search the latitude band, then check longitudes only inside it; indices
+            # are re-sorted so points keep the order of the catalog
+            min_lat, min_lon, max_lat, max_lon = zone_bbox
+            band = order[bisect.bisect_left(lats, min_lat):bisect.bisect_right(lats, max_lat)]
+            points = [points[i] for i in sorted(band) if min_lon <= points[i][1] <= max_lon]
+        
+        self._zone_points[key] = points
+        return points
+    
     def _load_ordinances(self):
         """Load ordinances data"""
         try:
-            with open(self.ordinances_file, 'r', encoding='utf-8') as f:
-                self.ordinances = json.load(f)
-            print(f"📦 Loaded {len(self.ordinances)} ordinances from {self.ordinances_file}")
+            with open(self.ordinances_file, 'rb') as f:
+                self.ordinances = json.loads(f.read())
+            if not self.quiet:
+                print(f"📦 Loaded {len(self.ordinances)} ordinances from {self.ordinances_file}")
         except FileNotFoundError:
             print(f"❌ Ordinances file not found: {self.ordinances_file}")
             raise
@@ -319,19 +594,25 @@ class PlacesEmbedder:
         zones = ord_data.get('zones', {})
         zone_names = ' '.join(zones.keys()).lower()
         
-        for config in CITIES.values():
-            # Check if any zone names match city-specific patterns
-            for zone_mapping in config.zone_mappings.keys():
-                if zone_mapping.lower() in zone_names:
-                    return config
+        # Check if any zone names match city-specific patterns, one regex scan per city
+        for config, pattern in self._city_patterns:
+            if pattern.search(zone_names):
+                return config
         
         return None
     
     def parse_specification(self, specification: str) -> Dict:
+        """Parse location specification into structured data, once per distinct specification"""
+        parsed = self._parsed_specs.get(specification)
+        if parsed is None:
+            parsed = self._parsed_specs[specification] = self._parse_specification(specification)
+        return parsed
+    
+    def _parse_specification(self, specification: str) -> Dict:
         """Parse location specification into structured data"""
         spec = specification.strip()
         
-        tratto_match = re.search(r'^(.+?)\s+tratto compreso tra (.+?)$', spec)
+        tratto_match = _TRATTO_RE.match(spec)
         if tratto_match:
             primary = tratto_match.group(1).strip()
             endpoints = [ep.strip() for ep in tratto_match.group(2).split(' e ')]
@@ -342,7 +623,7 @@ class PlacesEmbedder:
                 'places': [primary] + endpoints
             }
         
-        civico_match = re.search(r'^(.+?)\s*\(fronte civico (\d+)\)$', spec)
+        civico_match = _CIVICO_RE.match(spec)
         if civico_match:
             return {
                 'type': 'civico',
@@ -352,7 +633,7 @@ class PlacesEmbedder:
             }
         
         # Intersection pattern
-        incrocio_match = re.search(r'^(.+?)\s+incrocio con (.+?)$', spec)
+        incrocio_match = _INCROCIO_RE.match(spec)
         if incrocio_match:
             primary = incrocio_match.group(1).strip()
             intersecting = incrocio_match.group(2).strip()
@@ -371,10 +652,24 @@ class PlacesEmbedder:
         }
     
     def get_place_data(self, place_name: str, city_config: Optional[CityConfig] = None) -> Optional[Dict]:
+        """Get place data from catalog with city prefix handling, remembering each answer (also misses)"""
+        key = (place_name, city_config.city_name if city_config else None)
+        if key not in self._place_lookups:
+            self._place_lookups[key] = self._find_place_data(place_name, city_config)
+        return self._place_lookups[key]
+    
+    def get_zone_bbox(self, city_config: CityConfig, zone_name: str) -> Optional[Tuple[float, float, float, float]]:
+        """get_zone_bbox, remembering each answer (also misses)"""
+        key = (city_config.city_name, zone_name)
+        if key not in self._zone_bboxes:
+            self._zone_bboxes[key] = get_zone_bbox(city_config, zone_name)
+        return self._zone_bboxes[key]
+    
+    def _find_place_data(self, place_name: str, city_config: Optional[CityConfig] = None) -> Optional[Dict]:
         """Get place data from catalog with city prefix handling"""
         
         # ADD THIS DEBUG
-        if 'civico' in place_name:
+        if DEBUG and 'civico' in place_name:
             print(f"🔍 LOOKING UP: {place_name}")
         
         # ADD CIVIC NAME NORMALIZATION
@@ -384,14 +679,14 @@ class PlacesEmbedder:
         if 'fronte civico' in place_name:
             normalized = re.sub(r'\(fronte civico (\d+)\)', r'civico \1', place_name)
             normalized_names.append(normalized)
-            if 'civico' in place_name:
+            if DEBUG and 'civico' in place_name:
                 print(f"🔄 Normalized: '{place_name}' → '{normalized}'")
         
         # Try all normalized names
         for name_to_try in normalized_names:
             # Try direct lookup first
             if name_to_try in self.places_catalog:
-                if 'civico' in place_name:
+                if DEBUG and 'civico' in place_name:
                     print(f"✅ FOUND DIRECT: {name_to_try}")
                 return self.places_catalog[name_to_try]
                 
@@ -400,7 +695,7 @@ class PlacesEmbedder:
                 city_prefix = CITY_PREFIXES[city_config.city_name]
                 prefixed_name = f"{city_prefix}_{name_to_try}"
                 if prefixed_name in self.places_catalog:
-                    if 'civico' in place_name:
+                    if DEBUG and 'civico' in place_name:
                         print(f"✅ FOUND WITH PREFIX: {prefixed_name}")
                     return self.places_catalog[prefixed_name]
             
@@ -408,7 +703,7 @@ class PlacesEmbedder:
             for prefix in CITY_PREFIXES.values():
                 prefixed_name = f"{prefix}_{name_to_try}"
                 if prefixed_name in self.places_catalog:
-                    if 'civico' in place_name:
+                    if DEBUG and 'civico' in place_name:
                         print(f"✅ FOUND WITH FALLBACK PREFIX: {prefixed_name}")
                     return self.places_catalog[prefixed_name]
         
@@ -418,7 +713,7 @@ class PlacesEmbedder:
         """Process a single specification and return visualization data with zone filtering"""
         
         # ADD THIS BROAD DEBUG FIRST
-        if 'padova' in specification.lower() and 'tratto' in specification.lower():
+        if DEBUG and 'padova' in specification.lower() and 'tratto' in specification.lower():
             print(f"🚨🚨🚨 FOUND PADOVA TRACT: '{specification}'")
             print(f"   Zone: {zone_name}, Ord: {ord_id}")
         
@@ -426,20 +721,17 @@ class PlacesEmbedder:
         spec_type = parsed['type']
         
         # ADD THIS DEBUG TOO
-        if 'padova' in specification.lower() and 'tratto' in specification.lower():
+        if DEBUG and 'padova' in specification.lower() and 'tratto' in specification.lower():
             print(f"   Parsed type: {spec_type}")
             print(f"   Parsed data: {parsed}")
         
-        parsed = self.parse_specification(specification)
-        spec_type = parsed['type']
-        
         # Get zone bbox for filtering
         zone_bbox = None
         if city_config:
             if zone_name.startswith('no_'):
-                zone_bbox = (0,0,0,0)
+                zone_bbox = _EMPTY_BBOX
             else:
-                zone_bbox = get_zone_bbox(city_config, zone_name)
+                zone_bbox = self.get_zone_bbox(city_config, zone_name)
             if not zone_bbox:
                 print(f"⚠️ No bbox found for zone: {zone_name} in {city_config.city_name}")
         
@@ -520,7 +812,13 @@ class PlacesEmbedder:
             intersecting_data = place_data.get(parsed['intersecting'])
             
             if primary_data and intersecting_data:
-                intersection_point = find_intersection_point(primary_data, intersecting_data, zone_bbox=zone_bbox)
+                # The crossing is symmetric, so "A incrocio con B" and "B incrocio con A" share an entry
+                street_pair = tuple(sorted((parsed['primary'], parsed['intersecting'])))
+                intersection_key = (result['metadata']['city'], street_pair, zone_bbox)
+                if intersection_key not in self._intersections:
+                    self._intersections[intersection_key] = find_intersection_point(
+                        primary_data, intersecting_data, zone_bbox=zone_bbox, points_of=self._place_points)
+                intersection_point = self._intersections[intersection_key]
                 if intersection_point:
                     result['special_coordinates'] = [{
                         'type': 'Point',
@@ -550,7 +848,7 @@ class PlacesEmbedder:
             # Tract - compute segment between endpoints with zone filtering
             
             # ADD THIS DEBUG BLOCK
-            if 'padova' in specification.lower():
+            if DEBUG and 'padova' in specification.lower():
                 print(f"🚨 DEBUGGING TRACT: '{specification}'")
                 print(f"   Parsed primary: '{parsed['primary']}'")
                 print(f"   Parsed endpoints: {parsed['endpoints']}")
@@ -561,7 +859,7 @@ class PlacesEmbedder:
             endpoint2_data = place_data.get(parsed['endpoints'][1]) if len(parsed['endpoints']) > 1 else None
             
             # ADD MORE DEBUG
-            if 'padova' in specification.lower():
+            if DEBUG and 'padova' in specification.lower():
                 print(f"   Primary data found: {primary_data is not None}")
                 print(f"   Endpoint1 '{parsed['endpoints'][0]}' found: {endpoint1_data is not None}")
                 print(f"   Endpoint2 '{parsed['endpoints'][1]}' found: {endpoint2_data is not None}")
@@ -575,12 +873,13 @@ class PlacesEmbedder:
             
             if primary_data and endpoint1_data and endpoint2_data:
                 # ADD EVEN MORE DEBUG
-                if 'padova' in specification.lower():
+                if DEBUG and 'padova' in specification.lower():
                     print(f"   🎯 All data found, calling compute_tract_segment...")
                 
-                tract_geometries = compute_tract_segment(primary_data, endpoint1_data, endpoint2_data, zone_bbox=zone_bbox)
+                tract_geometries = compute_tract_segment(primary_data, endpoint1_data, endpoint2_data, zone_bbox=zone_bbox,
+                                                         points_of=self._place_points)
                 
-                if 'padova' in specification.lower():
+                if DEBUG and 'padova' in specification.lower():
                     print(f"   📐 Tract geometries returned: {len(tract_geometries)}")
                     for i, geom in enumerate(tract_geometries):
                         print(f"      Geom {i}: type={geom.get('type')}, coords={len(geom.get('coordinates', []))}")
@@ -590,7 +889,7 @@ class PlacesEmbedder:
                 result['metadata']['tract_calculated'] = True
             else:
                 # ADD DEBUG FOR FALLBACK
-                if 'padova' in specification.lower():
+                if DEBUG and 'padova' in specification.lower():
                     print(f"   ⚠️ Missing data, falling back to available places...")
                     print(f"   Available place data keys: {list(place_data.keys())}")
                 
@@ -622,6 +921,10 @@ class PlacesEmbedder:
             'places_found_without_prefix': 0
         }
         
+        # Walk ordinances and zones once, building the output skeleton and a flat work
+        # queue of (results dict, specification, zone, ordinance, city) to process
+        work = []
+        computed = 0  # intersections and tracts among the queued specifications
         for ord_id, ord_data in self.ordinances.items():
             # Detect city for this ordinance
             city_config = self.detect_city_from_ordinance(ord_id, ord_data)
@@ -647,37 +950,54 @@ class PlacesEmbedder:
             }
             
             for zone_name, specifications in ord_data.get('zones', {}).items():
-                coordinates_data[ord_id]['zones'][zone_name] = {}
+                zone_results = coordinates_data[ord_id]['zones'][zone_name] = {}
                 
                 # Check if zone has bbox with current city config
-                has_bbox = city_config and get_zone_bbox(city_config, zone_name) is not None
+                has_bbox = city_config and self.get_zone_bbox(city_config, zone_name) is not None
                 if has_bbox:
                     stats['zones_with_bbox'] += 1
                 else:
                     stats['zones_without_bbox'] += 1
                 
                 for specification in specifications:
-                    stats['total_specifications'] += 1
-                                        
-                    result = self.process_specification(specification, zone_name, ord_id, city_config)            
-                    coordinates_data[ord_id]['zones'][zone_name][specification] = result
-                    
-                    # Update stats
-                    spec_type = result['type']
-                    stats[spec_type] += 1
-                    
-                    if result['metadata'].get('intersection_calculated'):
-                        stats['intersections_calculated'] += 1
-                    if result['metadata'].get('tract_calculated'):
-                        stats['tracts_calculated'] += 1
-                    if result['metadata'].get('places_missing'):
-                        stats['missing_places'] += len(result['metadata']['places_missing'])
-                    if result['metadata'].get('bbox_filtered'):
-                        stats['bbox_filtered_specs'] += 1
-                    
-                    # Track place finding success with/without prefix
-                    if result['metadata'].get('places_found'):
-                        stats['places_found_with_prefix'] += len(result['metadata']['places_found'])
+                    work.append((zone_results, specification, zone_name, ord_id, city_config))
+                    if self.parse_specification(specification)['type'] in ('incrocio', 'tratto'):
+                        computed += 1
+        
+        stats['total_specifications'] = len(work)
+        
+        # Intersections and tracts dominate; with enough of them, use all cores
+        if computed >= PARALLEL_MIN_COMPUTED:
+            jobs = [(specification, zone_name, ord_id, city_config)
+                    for _, specification, zone_name, ord_id, city_config in work]
+            workers = os.cpu_count() or 1
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(self.places_file, self.ordinances_file)) as executor:
+                results = list(executor.map(_process_in_worker, jobs,
+                                            chunksize=max(1, len(jobs) // (workers * 4))))
+        else:
+            results = [self.process_specification(specification, zone_name, ord_id, city_config)
+                       for _, specification, zone_name, ord_id, city_config in work]
+        
+        for (zone_results, specification, _, _, _), result in zip(work, results):
+            zone_results[specification] = result
+            
+            # Update stats
+            stats[result['type']] += 1
+            
+            metadata = result['metadata']
+            if metadata.get('intersection_calculated'):
+                stats['intersections_calculated'] += 1
+            if metadata.get('tract_calculated'):
+                stats['tracts_calculated'] += 1
+            if metadata.get('places_missing'):
+                stats['missing_places'] += len(metadata['places_missing'])
+            if metadata.get('bbox_filtered'):
+                stats['bbox_filtered_specs'] += 1
+            
+            # Track place finding success with/without prefix
+            if metadata.get('places_found'):
+                stats['places_found_with_prefix'] += len(metadata['places_found'])
         
         print(f"\n📊 Processing Statistics:")
         print(f"   📍 Total specifications: {stats['total_specifications']}")
@@ -690,64 +1010,48 @@ class PlacesEmbedder:
         print(f"   🌍 Cities detected: {dict(stats['cities_detected'])}")
         print(f"   ❓ Ordinances without city detection: {stats['ordinances_no_city']}")
         
+        # The per-zone point lists are only needed while specifications are processed
+        self._zone_points.clear()
+        
         return coordinates_data
 
     
     def embed_into_html(self, html_file: str = "rome_viewer_osm.html", output_file: str = "rome_viewer_embedded.html"):
         """Embed processed coordinates into HTML viewer"""
-        print(f"🚨 EMBEDDING STARTED!")
         print(f"🌐 Embedding into HTML viewer...")
 
-        coordinates_data = self.process_all_ordinances()
-        print(f"🔍 process_all_ordinances() completed!")
-        print(f"📊 Coordinates data keys: {list(coordinates_data.keys())}")
-
-
         # Process all ordinances
         coordinates_data = self.process_all_ordinances()
 
-
-        # Load HTML template
+        # Map the HTML template instead of reading it into a string (so it can't be rewritten in place)
+        if os.path.abspath(html_file) == os.path.abspath(output_file):
+            print(f"❌ Output file must differ from the HTML template: {output_file}")
+            return
         try:
-            with open(html_file, 'r', encoding='utf-8') as f:
-                html_content = f.read()
+            template = open(html_file, 'rb')
         except FileNotFoundError:
             print(f"❌ HTML template not found: {html_file}")
             return
         
-        # Convert to JavaScript
-        js_data = json.dumps(coordinates_data, indent=4)
-        embedded_line = f"        coordinatesData = {js_data};"
-        
-        # Replace fetch pattern
-        fetch_patterns = [
-            "coordinatesData = await fetch('./coordinates.json').then(response => response.json());",
-            "coordinatesData = await fetch('./coordinates_backup.json').then(response => response.json());",
-            "        coordinatesData = await fetch('./coordinates.json').then(response => response.json());"
-        ]
-        
-        replaced = False
-        for pattern in fetch_patterns:
-            if pattern in html_content:
-                html_content = html_content.replace(pattern, embedded_line)
-                replaced = True
-                break
-        
-        if not replaced:
-            # Try to find any fetch pattern and replace
-            import re
-            fetch_pattern = re.search(r'coordinatesData = await fetch\([^)]+\)[^;]+;', html_content)
-            if fetch_pattern:
-                html_content = html_content.replace(fetch_pattern.group(0), embedded_line)
-                replaced = True
-        
-        if not replaced:
-            print("❌ Could not find coordinates loading pattern in HTML")
-            return
-        
-        # Save embedded HTML
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        with template, mmap.mmap(template.fileno(), 0, access=mmap.ACCESS_READ) as html_content:
+            # Locate the fetch statement to replace, whatever file it loads, in one scan
+            fetch_match = _FETCH_RE.search(html_content)
+            if fetch_match is None:
+                print("❌ Could not find coordinates loading pattern in HTML")
+                return
+            span = fetch_match.span()
+            
+            # Convert to JavaScript: compact JSON wrapped in a string literal for JSON.parse,
+            # which browsers parse faster than the equivalent object literal
+            js_data = json.dumps(json.dumps(coordinates_data, separators=(',', ':')))
+            
+            # Save embedded HTML, writing zero-copy views of the template around the data
+            with open(output_file, 'wb') as f, memoryview(html_content) as template_view:
+                f.write(template_view[:span[0]])
+                f.write(b"        coordinatesData = JSON.parse(")
+                f.write(js_data.encode('utf-8'))
+                f.write(b");")
+                f.write(template_view[span[1]:])
         
         print(f"✅ Created {output_file}")
         print(f"🎯 Ready to view: open {output_file} in your browser")
@@ -757,8 +1061,9 @@ class PlacesEmbedder:
         """Save processed coordinates to JSON file"""
         coordinates_data = self.process_all_ordinances()
                 
+        # Encode to one string and write once; json.dump issues a write per encoder chunk
         with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(coordinates_data, f, ensure_ascii=False, indent=2)
+            f.write(json.dumps(coordinates_data, ensure_ascii=False, indent=2))
         
         print(f"💾 Saved processed coordinates to {output_file}")
         print(f"🌍 Automatic city detection and zone filtering applied")